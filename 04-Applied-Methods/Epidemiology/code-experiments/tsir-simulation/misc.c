@@ -8,6 +8,10 @@
 extern GLOBALS g;
 extern NODE *n;
 
+static void *map = NULL; // the memory-mapped network file, if any
+static size_t map_size;
+static unsigned int **tp; // contact time pointers of all nodes (when mapped)
+
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 // giving exponential random numbers with a mean reciprocal of the recovery rate
 
@@ -58,3 +62,84 @@ void read_data () {
 }
 
 // - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+// this routine memory-maps a network compiled by the wrapper (see
+// compile_network in read_run.py) instead of parsing text: a header of
+// eight unsigned ints (magic, version, N, duration, total degree M, number
+// of contact times T, two unused), then the CSR arrays off[N + 1], nb[M],
+// nc[M], tof[M] and times[T]. The neighbors of me are entries off[me] to
+// off[me + 1] - 1 of nb & nc, and entry k has the contact times
+// times[tof[k]] .. times[tof[k] + nc[k] - 1]. nb & nc are used in place;
+// only the pointers of t are set up, so several runs share the page cache
+
+void map_data (char *fname) {
+	unsigned int i, me, *h, *off, *nb, *nc, *tof, *times;
+	struct stat st;
+	int fd;
+
+	fd = open(fname, O_RDONLY);
+	if ((fd < 0) || fstat(fd, &st)) {
+		fprintf(stderr, "can't open %s\n", fname);
+		exit(1);
+	}
+	map_size = st.st_size;
+	if (map_size < NHEADER * sizeof(unsigned int)) {
+		fprintf(stderr, "reading error 1\n");
+		exit(1);
+	}
+	map = mmap(NULL, map_size, PROT_READ, MAP_SHARED, fd, 0);
+	close(fd);
+	if (map == MAP_FAILED) {
+		fprintf(stderr, "can't map %s\n", fname);
+		exit(1);
+	}
+
+	h = map;
+	if ((h[0] != MAGIC) || (h[1] != VERSION)) { // also catches files written with the other byte order
+		fprintf(stderr, "%s is not a version %u network file\n", fname, VERSION);
+		exit(1);
+	}
+	g.n = h[2];
+	g.dur = h[3];
+	if (map_size != (NHEADER + (size_t) g.n + 1 + 3 * (size_t) h[4] + h[5]) * sizeof(unsigned int)) {
+		fprintf(stderr, "reading error 2\n");
+		exit(1);
+	}
+
+	off = h + NHEADER;
+	nb = off + g.n + 1;
+	nc = nb + h[4];
+	tof = nc + h[4];
+	times = tof + h[4];
+
+	n = calloc(g.n, sizeof(NODE));
+	tp = malloc((h[4] + 1) * sizeof(unsigned int *));
+
+	for (i = 0; i < h[4]; i++) tp[i] = times + tof[i];
+
+	for (me = 0; me < g.n; me++) {
+		n[me].deg = off[me + 1] - off[me];
+		n[me].nb = nb + off[me];
+		n[me].nc = nc + off[me];
+		n[me].t = tp + off[me];
+	}
+}
+
+// - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+// cleaning up after read_data or map_data
+
+void free_data () {
+	unsigned int i, j;
+
+	if (map) {
+		munmap(map, map_size);
+		free(tp);
+	} else for (i = 0; i < g.n; i++) {
+		for (j = 0; j < n[i].deg; j++) free(n[i].t[j]);
+		free(n[i].nb);
+		free(n[i].nc);
+		free(n[i].t);
+	}
+	free(n);
+}
+
+// - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
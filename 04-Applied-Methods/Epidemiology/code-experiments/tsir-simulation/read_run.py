@@ -1,61 +1,196 @@
 ##   Common routines for Python wrapper for temporal network SIR C code
 
-import networkx as nx
+import numpy as np
+import os
+from hashlib import sha256
+from itertools import chain
 from random import getrandbits
 from subprocess import Popen, PIPE, STDOUT
 
+MAGIC = 0x52495354 # "TSIR", must match tsir.h
+VERSION = 1
+CACHE_DIR = '.tsir_cache' # next to the contact list
+SUFFIX = '.tsirnet'
+
 ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##
-# This function reads the network. The input file contains
+# This function reads the contact list. The input file contains
 # three columns [id 1] [id 2] [time], showing that id 1 has
-# been in contact with id 2 at time t
-# nodes with no contacts are not considered
-
-def read_network (fname):
+# been in contact with id 2 at time t. It is read in chunks of
+# lines; node ids are numbered in order of first appearance
+# (id 1 before id 2), skipping self-contacts, so nodes with no
+# contacts are not considered
 
-	G = nx.Graph()
+def read_contacts (fname, chunk_bytes = 1 << 24):
 
-	tmax = 0
+	ids = {}
+	us, vs, ts = [], [], []
+	nself = 0
 
 	try:
 		with open(fname) as f:
-			for l in f:
-				a = l.strip().split()
-				if len(a) == 3:
-					if a[0] != a[1]:
-						b = int(a[2])
-						if tmax < b:
-							tmax = b
-						if G.has_edge(a[0],a[1]):
-							if b not in G.edges[a[0],a[1]]['times']: # excluding identical events
-								G.edges[a[0],a[1]]['times'].append(b)
-							else:
-								print('ignoring multiple events', a[0], a[1], a[2])
+			while True:
+				lines = f.readlines(chunk_bytes)
+				if not lines:
+					break
+				u, v, t = [], [], []
+				for l in lines:
+					a = l.split()
+					if len(a) == 3:
+						if a[0] != a[1]:
+							u.append(ids.setdefault(a[0], len(ids)))
+							v.append(ids.setdefault(a[1], len(ids)))
+							t.append(int(a[2]))
 						else:
-							G.add_edge(a[0],a[1])
-							G.edges[a[0],a[1]]['times'] = [b]
-					else:
-						print('ignoring self-contact of', a[0])
+							nself += 1
+				us.append(np.array(u, dtype=np.int64))
+				vs.append(np.array(v, dtype=np.int64))
+				ts.append(np.array(t, dtype=np.int64))
+	except:
+		print('reading error in:', fname)
+		exit(1)
+
+	if nself:
+		print('ignoring', nself, 'self-contacts')
+
+	empty = [np.empty(0, dtype=np.int64)]
+	return len(ids), np.concatenate(us + empty), np.concatenate(vs + empty), np.concatenate(ts + empty)
+
+##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##
+# This function builds the temporal network as the C code wants it,
+# with array operations: identical contacts are removed, then for
+# every node its neighbors in decreasing order of their last contact
+# time (ties by decreasing id, which the C code's early break relies
+# on), each with its contact times in increasing order. Returned as
+# CSR-style arrays: the neighbors of node i are entries
+# off[i]..off[i + 1] of nb and nc, and the contact times of entry k
+# are times[tof[k]..tof[k] + nc[k]]
+
+def build_network (n, u, v, t):
+
+	lo = np.minimum(u, v)
+	hi = np.maximum(u, v)
+	key = lo * max(n, 1) + hi
+
+	# sorting contacts by link, then time; dropping repeated events
+	order = np.lexsort((t, key))
+	key, t = key[order], t[order]
+	keep = np.ones(len(key), dtype=bool)
+	keep[1:] = (key[1:] != key[:-1]) | (t[1:] != t[:-1])
+	if not keep.all():
+		print('ignoring', int((~keep).sum()), 'multiple events')
+	key, times = key[keep], t[keep]
+
+	# one entry per link: its nodes, number of contacts, first contact index and last time
+	first = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.empty(0, dtype=np.int64)
+	nc = np.diff(np.r_[first, len(key)])
+	last = times[first + nc - 1]
+	lo, hi = key[first] // max(n, 1), key[first] % max(n, 1)
+
+	# both directions of every link, sorted by node, decreasing last time, decreasing neighbor
+	src = np.concatenate((lo, hi))
+	nb = np.concatenate((hi, lo))
+	link = np.concatenate((np.arange(len(first)), np.arange(len(first))))
+	order = np.lexsort((-nb, -last[link], src))
+	src, nb, link = src[order], nb[order], link[order]
+
+	return {
+		'n': n,
+		'tmax': int(times.max()) if len(times) else 0,
+		'off': np.r_[0, np.cumsum(np.bincount(src, minlength=n))],
+		'nb': nb,
+		'nc': nc[link],
+		'tof': first[link],
+		'times': times,
+	}
+
+##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##
+# This function assembles the text input of the C code from the arrays:
+# one number per line, except the header line [N] [duration] and the
+# [neighbor] [number of contacts] lines
+
+def network_text (net):
+
+	n, off, nb, nc, tof, times = net['n'], net['off'], net['nb'], net['nc'], net['tof'], net['times']
+	deg = np.diff(off)
+	m = len(nb)
+
+	# token positions: the header, then per node its degree followed by,
+	# for each neighbor, the neighbor id, the count and the times
+	size = 2 + nc
+	pos = 2 + np.searchsorted(off, np.arange(m), side='right') + np.r_[0, np.cumsum(size)[:-1]]
+	dpos = 2 + np.arange(n) + np.r_[0, np.cumsum(size)][off[:-1]]
+	total = 2 + n + int(size.sum())
+
+	tokens = np.empty(total, dtype=np.int64)
+	seps = np.full(total, '\n')
+	tokens[0], tokens[1] = n, net['tmax']
+	seps[0] = ' '
+	tokens[dpos] = deg
+	tokens[pos] = nb
+	seps[pos] = ' '
+	tokens[pos + 1] = nc
+	within = np.arange(int(nc.sum())) - np.repeat(np.r_[0, np.cumsum(nc)[:-1]], nc)
+	tokens[np.repeat(pos + 2, nc) + within] = times[np.repeat(tof, nc) + within]
+
+	return ''.join(chain.from_iterable(zip(map(str, tokens.tolist()), seps.tolist())))
+
+##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##
+# This function reads the network and returns it in the text format
+# of the C code
+
+def read_network (fname):
+
+	return network_text(build_network(*read_contacts(fname)))
+
+##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##
+# This function writes the network in the binary format the C code
+# memory-maps (see map_data in misc.c): a header of eight 32-bit
+# unsigned ints, then the arrays off, nb, nc, tof and times
+
+def write_network (net, fname):
+
+	m, ntimes = len(net['nb']), len(net['times'])
+	if max(net['n'], m, ntimes, net['tmax']) >= 0xfffffffe:
+		print('network too large for 32-bit indices:', fname)
+		exit(1)
+
+	header = [MAGIC, VERSION, net['n'], net['tmax'], m, ntimes, 0, 0]
+	tmp = fname + '.' + str(os.getpid()) + '.tmp'
+	with open(tmp, 'wb') as f:
+		for a in (header, net['off'], net['nb'], net['nc'], net['tof'], net['times']):
+			f.write(np.asarray(a, dtype='<u4').tobytes())
+	os.replace(tmp, fname) # so concurrent runs never see half a file
+
+##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##
+# This function returns the path of the compiled network of a contact
+# list, building it only if there is none for this content yet. Files
+# are named by the SHA-256 of the contact list, so an edited list gets
+# a new file and a copied one reuses the old
+
+def compile_network (fname):
+
+	h = sha256()
+	try:
+		with open(fname, 'rb') as f:
+			for b in iter(lambda: f.read(1 << 20), b''):
+				h.update(b)
 	except:
 		print('reading error in:', fname)
 		exit(1)
 
-	H = nx.convert_node_labels_to_integers(G) # this can change the id numbers from the original file
+	cache = os.path.join(os.path.dirname(os.path.abspath(fname)), CACHE_DIR)
+	path = os.path.join(cache, h.hexdigest() + '-v' + str(VERSION) + SUFFIX)
 
-	# assembling the temporal network in the format of the C code
-	nwk = str(H.number_of_nodes()) + ' ' + str(tmax) + '\n'
-	for i in range(H.number_of_nodes()):
-		nwk += str(H.degree(i)) + '\n'
-		to_sort = []
-		for v in H.neighbors(i):
-			to_sort.append((max(H.edges[i,v]['times']),v))
-		for x,v in sorted(to_sort,reverse=True):
-			nwk += str(v) + ' ' + str(len(H.edges[i,v]['times'])) + '\n'
-			for t in sorted(H.edges[i,v]['times']):
-				nwk += str(t) + '\n'
+	if not os.path.isfile(path):
+		os.makedirs(cache, exist_ok=True)
+		write_network(build_network(*read_contacts(fname)), path)
 
-	return nwk
+	return path
 
 ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##
+# This function runs the C code. nwk is either the text network from
+# read_network (piped through the standard input) or the path of a
+# compiled network from compile_network (memory-mapped by the C code)
 
 def run (nwk, beta, nu):
 
@@ -65,8 +200,13 @@ def run (nwk, beta, nu):
 		beta = 1.0
 	assert(nu > 0)
 
-	p = Popen(['./tsir', str(beta), str(nu), str(getrandbits(64))], stdout=PIPE, stdin=PIPE, stderr=STDOUT)
-	o = p.communicate(input=bytes(nwk,encoding='utf-8'))[0]
+	cmd = ['./tsir', str(beta), str(nu), str(getrandbits(64))]
+	if nwk.endswith(SUFFIX):
+		p = Popen(cmd + [nwk], stdout=PIPE, stderr=STDOUT)
+		o = p.communicate()[0]
+	else:
+		p = Popen(cmd, stdout=PIPE, stdin=PIPE, stderr=STDOUT)
+		o = p.communicate(input=bytes(nwk,encoding='utf-8'))[0]
 
 	# interpret and report the output
 	a = o.decode().split('\n')
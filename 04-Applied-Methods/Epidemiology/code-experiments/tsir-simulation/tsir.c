@@ -96,13 +96,14 @@ void sir () {
 // main function handling i/o
 
 int main (int argc, char *argv[]) {
-	unsigned int i, j;
+	unsigned int i;
 	double d, x, s1 = 0.0, s2 = 0.0; // for averages
 	
 	g.state = strtoull(argv[3], NULL, 10); // argv[3] is the RNG state
 
-	// read network
-	read_data();
+	// read network, from a compiled file if given (argv[4]), else the standard input
+	if (argc > 4) map_data(argv[4]);
+	else read_data();
 
 	// initialize parameters
 	d = atof(argv[1]);
@@ -141,13 +142,8 @@ int main (int argc, char *argv[]) {
 	printf("%g %g\n", s1, sqrt((s2 - SQ(s1)) / (NAVG - 1)));
 	
 	// cleaning up
-	for (i = 0; i < g.n; i++) {
-		for (j = 0; j < n[i].deg; j++) free(n[i].t[j]);
-		free(n[i].nb);
-		free(n[i].nc);
-		free(n[i].t);
-	}
-	free(n); free(g.heap); free(g.s);
+	free_data();
+	free(g.heap); free(g.s);
 	 
 	return 0;
 }
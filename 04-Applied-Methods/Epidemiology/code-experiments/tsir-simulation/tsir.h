@@ -9,9 +9,16 @@
 #include <fcntl.h>
 #include <unistd.h>
 #include <stdint.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 
 #define NAVG 1000000 // number of runs for averages
 
+// compiled network files (see map_data in misc.c)
+#define MAGIC 0x52495354u // "TSIR" in little-endian byte order
+#define VERSION 1
+#define NHEADER 8 // header size in unsigned ints
+
 #define NONE (UINT_MAX - 1)
 #define END UINT_MAX // NONE and END are used in various ways, the only purpose of NONE < END is for the S(x) macro
 
@@ -46,6 +53,8 @@ extern void del_root ();
 
 // misc.c
 extern void read_data ();
+extern void map_data (char *);
+extern void free_data ();
 extern unsigned int exptime ();
 
 // pcg_rnd.c
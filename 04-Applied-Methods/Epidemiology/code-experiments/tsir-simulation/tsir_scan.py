@@ -1,7 +1,7 @@
 ##   Python wrapper for the temporal network SIR C code
 
 from sys import argv
-from read_run import run, read_network
+from read_run import run, compile_network
 import numpy as np
 import matplotlib.pyplot as plt
 import progressbar # install progressbar2
@@ -22,7 +22,7 @@ if __name__ == '__main__':
 		print('usage: python3 tsir_scan.py [temporal network] [output file]')
 		exit(1)
 
-	nwk = read_network(argv[1])
+	nwk = compile_network(argv[1])
 
 	# running the C code
 	nus = np.geomspace(NU_MIN,NU_MAX,NNU)
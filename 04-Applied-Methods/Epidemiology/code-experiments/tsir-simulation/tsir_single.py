@@ -1,7 +1,7 @@
 # Python wrapper for the temporal network SIR C code
 
 from sys import argv
-from read_run import run, read_network
+from read_run import run, compile_network
 
 ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##   ##
 
@@ -11,7 +11,7 @@ if __name__ == '__main__':
 		print('usage: python3 tsir_single.py [temporal network] [beta] [nu]')
 		exit(1)
 	
-	omega, err = run(read_network(argv[1]), float(argv[2]), float(argv[3]))
+	omega, err = run(compile_network(argv[1]), float(argv[2]), float(argv[3]))
 
 	print('avg. outbreak size:', omega, '(' + str(err) + ')')
 	
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from gemini_cache import UPLOAD_TTL_S, UploadRegistry
+from model_client import INLINE_SIZE_LIMIT, ModelClientError, reuse_or_upload
+
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "lognormal")
+TILE_LABELS_RE = re.compile(r"Page labels present:\s*([\d,\s]+)")
+PAGE_LABEL_RE = re.compile(r"Page label:\s*(\d+)")
+
+
+class FakeResponse:
+    def __init__(self, text: str, usage_metadata: Optional[Dict[str, int]] = None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeBackend:
+    """Local stand-in for GeminiBackend, for benchmarking without spending quota.
+
+    Responses follow the page/tile prompt schema, echoing the page labels found
+    in the prompt. Latency is drawn from a configurable distribution, and a
+    share of calls can be turned into 429s (with retryDelay and QuotaFailure
+    details shaped like the real API), daily-quota failures or malformed bodies.
+    Tile responses can leave out pages (`drop_page_rate`), as real models do.
+    Payloads over `inline_limit` go through a stand-in Files API upload that
+    takes `upload_latency_ms` and hands out handles living `upload_ttl_s`.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_distribution: str = "lognormal",
+        latency_spread: float = 0.5,
+        rate_limit_rate: float = 0.0,
+        retry_delay_s: float = 1.0,
+        daily_quota_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        drop_page_rate: float = 0.0,
+        images_per_page: int = 1,
+        seed: Optional[int] = 0,
+        inline_limit: int = INLINE_SIZE_LIMIT,
+        upload_latency_ms: float = 0.0,
+        upload_ttl_s: float = UPLOAD_TTL_S,
+        uploads: Optional[UploadRegistry] = None,
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_delay_s = retry_delay_s
+        self.daily_quota_rate = daily_quota_rate
+        self.malformed_rate = malformed_rate
+        self.drop_page_rate = drop_page_rate
+        self.images_per_page = images_per_page
+        self.inline_limit = inline_limit
+        self.upload_latency_ms = upload_latency_ms
+        self.upload_ttl_s = upload_ttl_s
+        self.uploads = uploads
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "rate_limited": 0, "malformed": 0, "uploads": 0, "dropped_pages": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def _draw(self) -> Dict[str, float]:
+        with self._lock:
+            roll = self._random.random()
+            if self.latency_distribution == "constant":
+                latency = self.latency_ms
+            elif self.latency_distribution == "uniform":
+                spread = self.latency_ms * self.latency_spread
+                latency = self._random.uniform(self.latency_ms - spread, self.latency_ms + spread)
+            else:
+                latency = self.latency_ms * math.exp(self._random.gauss(0.0, self.latency_spread))
+        return {"roll": roll, "latency_s": max(0.0, latency) / 1000.0}
+
+    def prepare(self, image_data: bytes, mime_type: str, prompt: str, refresh: bool = False) -> List[Any]:
+        if len(image_data) > self.inline_limit:
+            handle = reuse_or_upload(
+                self.uploads, image_data, mime_type, lambda: self.upload(image_data, mime_type), refresh=refresh
+            )
+            return [{"file_uri": handle["uri"], "mime_type": handle["mime_type"]}, prompt]
+        return [{"inline_bytes": len(image_data), "mime_type": mime_type}, prompt]
+
+    def upload(self, image_data: bytes, mime_type: str) -> Dict[str, Any]:
+        self._count("uploads")
+        time.sleep(self.upload_latency_ms / 1000.0)
+        with self._lock:
+            number = self.counters["uploads"]
+        return {
+            "name": f"files/fake-{number}",
+            "uri": f"fake://files/fake-{number}",
+            "mime_type": mime_type,
+            "expires_at": time.time() + self.upload_ttl_s,
+        }
+
+    def generate(self, model: str, contents: List[Any]) -> FakeResponse:
+        self._count("calls")
+        draw = self._draw()
+        roll = draw["roll"]
+        time.sleep(draw["latency_s"])
+        if roll < self.daily_quota_rate:
+            self._count("rate_limited")
+            raise ModelClientError(429, self.quota_details("GenerateRequestsPerDayPerProjectPerModel"))
+        roll -= self.daily_quota_rate
+        if roll < self.rate_limit_rate:
+            self._count("rate_limited")
+            raise ModelClientError(429, self.quota_details("GenerateRequestsPerMinutePerProjectPerModel"))
+        roll -= self.rate_limit_rate
+
+        prompt = str(contents[-1])
+        payload = self.build_payload(prompt)
+        text = json.dumps(payload, ensure_ascii=False)
+        if roll < self.malformed_rate:
+            self._count("malformed")
+            text = text[: max(1, len(text) // 2)]
+        usage = {
+            "prompt_token_count": len(prompt) // 4 + 258,
+            "candidates_token_count": len(text) // 4,
+        }
+        return FakeResponse(text, usage)
+
+    def quota_details(self, quota_id: str) -> Dict[str, Any]:
+        return {
+            "error": {
+                "code": 429,
+                "status": "RESOURCE_EXHAUSTED",
+                "message": "Resource has been exhausted (fake backend).",
+                "details": [
+                    {
+                        "@type": "type.googleapis.com/google.rpc.QuotaFailure",
+                        "violations": [{"quotaMetric": "generate_content_requests", "quotaId": quota_id}],
+                    },
+                    {
+                        "@type": "type.googleapis.com/google.rpc.RetryInfo",
+                        "retryDelay": f"{self.retry_delay_s:g}s",
+                    },
+                ],
+            }
+        }
+
+    def page_payload(self, page_no: int) -> Dict[str, Any]:
+        images = []
+        placeholders = []
+        for index in range(1, self.images_per_page + 1):
+            label = f"fig_{index}"
+            top = 100 + 300 * (index - 1)
+            images.append({"label": label, "bbox_norm": [top, 100, min(1000, top + 250), 900]})
+            placeholders.append(f"[[IMAGE:{label}]]")
+        body = "\n\n".join([f"# Page {page_no:03d}", "Synthetic text from the fake backend."] + placeholders)
+        return {"markdown": body, "images": images}
+
+    def build_payload(self, prompt: str) -> Dict[str, Any]:
+        tile_match = TILE_LABELS_RE.search(prompt)
+        if tile_match:
+            numbers = [int(item) for item in tile_match.group(1).replace(" ", "").split(",") if item]
+            if self.drop_page_rate:
+                with self._lock:
+                    kept = [page_no for page_no in numbers if self._random.random() >= self.drop_page_rate]
+                    self.counters["dropped_pages"] += len(numbers) - len(kept)
+                numbers = kept
+            return {"pages": [dict(self.page_payload(page_no), page=page_no) for page_no in numbers]}
+        page_match = PAGE_LABEL_RE.search(prompt)
+        return self.page_payload(int(page_match.group(1)) if page_match else 1)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Gemini Files API uploads live for 48 hours; reuse stops an hour before that.
+UPLOAD_TTL_S = 48 * 3600.0
+UPLOAD_EXPIRY_MARGIN_S = 3600.0
+
+
+def default_cache_dir() -> Path:
+    base = os.getenv("XDG_CACHE_HOME")
+    root = Path(base).expanduser() if base else Path.home() / ".cache"
+    return root / "pdf_parse" / "responses"
+
+
+def default_upload_registry() -> Path:
+    return default_cache_dir().parent / "uploads.json"
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def credential_fingerprint(credential: str) -> str:
+    """Short, non-reversible tag for an API key or project, to scope upload handles."""
+    return sha256_hex(f"pdf_parse-credential\n{credential}".encode("utf-8"))[:16]
+
+
+class ResponseCache:
+    """Content-addressed store of raw Gemini JSON responses.
+
+    Entries are keyed by the image bytes hash, the rendered prompt hash and the
+    model name, so identical page images hit the cache regardless of output
+    directory, section split or --force. Reads refresh the entry mtime, and
+    eviction drops the least recently used entries once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(image_bytes: bytes, prompt: str, model: str) -> str:
+        parts = [sha256_hex(image_bytes), sha256_hex(prompt.encode("utf-8")), model]
+        return sha256_hex("\n".join(parts).encode("utf-8"))
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._entry_path(key)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        raw = payload.get("raw")
+        with self._lock:
+            if isinstance(raw, str):
+                self.hits += 1
+            else:
+                self.misses += 1
+        return raw if isinstance(raw, str) else None
+
+    def put(self, key: str, raw: str, model: str, prompt: str) -> None:
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "key": key,
+            "model": model,
+            "prompt_sha256": sha256_hex(prompt.encode("utf-8")),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "raw": raw,
+        }
+        data = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        with self._lock:
+            # The key may already be cached (by another thread or run): count
+            # only the difference, not the entry twice.
+            try:
+                old_size = path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp_path, path)
+            if self._total_bytes is not None:
+                self._total_bytes += len(data) - old_size
+            over_budget = self.max_bytes is not None and self._total_bytes_locked() > self.max_bytes
+        if over_budget:
+            self.prune(max_bytes=self.max_bytes)
+
+    def _total_bytes_locked(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _path, size, _mtime in self.entries())
+        return self._total_bytes
+
+    def entries(self) -> List[Tuple[Path, int, float]]:
+        results: List[Tuple[Path, int, float]] = []
+        if not self.cache_dir.exists():
+            return results
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            results.append((path, stat.st_size, stat.st_mtime))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.entries()
+        mtimes = [mtime for _path, _size, mtime in entries]
+        return {
+            "cache_dir": str(self.cache_dir),
+            "entries": len(entries),
+            "bytes": sum(size for _path, size, _mtime in entries),
+            "max_bytes": self.max_bytes,
+            "oldest_access": datetime.fromtimestamp(min(mtimes), timezone.utc).isoformat() if mtimes else None,
+            "newest_access": datetime.fromtimestamp(max(mtimes), timezone.utc).isoformat() if mtimes else None,
+        }
+
+    def prune(self, max_bytes: Optional[int] = None, older_than: Optional[float] = None) -> Tuple[int, int]:
+        """Evict entries idle longer than `older_than` seconds, then LRU down to `max_bytes`."""
+        entries = sorted(self.entries(), key=lambda item: item[2])
+        total = sum(size for _path, size, _mtime in entries)
+        cutoff = time.time() - older_than if older_than is not None else None
+        removed = 0
+        freed = 0
+        for path, size, mtime in entries:
+            expired = cutoff is not None and mtime < cutoff
+            over_budget = max_bytes is not None and total > max_bytes
+            if not expired and not over_budget:
+                if cutoff is None:
+                    break
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            freed += size
+        with self._lock:
+            self._total_bytes = total
+        return removed, freed
+
+
+class UploadRegistry:
+    """Remote file handles keyed by upload content hash, with expiry times.
+
+    Lets a re-run (or another page with identical bytes) reuse a file that
+    is still live on the service instead of uploading it again. Handles are
+    dicts with at least `uri`, `mime_type` and `expires_at` (epoch seconds).
+    The JSON file is re-read and merged before each write, so concurrent runs
+    at worst upload the same file twice. Keys include `scope` (a
+    credential_fingerprint), since files are only visible to the key or
+    project that uploaded them.
+    """
+
+    def __init__(self, path: Path, margin_s: float = UPLOAD_EXPIRY_MARGIN_S, scope: str = ""):
+        self.path = path
+        self.margin_s = margin_s
+        self.scope = scope
+        self.reused = 0
+        self.uploaded = 0
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @staticmethod
+    def make_key(data: bytes, mime_type: str, scope: str = "") -> str:
+        prefix = f"{scope}\n" if scope else ""
+        return sha256_hex((prefix + mime_type).encode("utf-8") + b"\n" + data)
+
+    def key(self, data: bytes, mime_type: str) -> str:
+        return self.make_key(data, mime_type, self.scope)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        now = time.time()
+        return {
+            key: entry
+            for key, entry in payload.get("uploads", {}).items()
+            if isinstance(entry, dict) and entry.get("expires_at", 0) > now
+        }
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._read()
+            entry = self._entries.get(key)
+            if entry is None or entry.get("expires_at", 0) - self.margin_s <= time.time():
+                return None
+            self.reused += 1
+            return dict(entry)
+
+    def put(self, key: str, handle: Dict[str, Any]) -> None:
+        with self._lock:
+            self.uploaded += 1
+            entries = self._read()
+            entries.update(self._entries or {})
+            entries[key] = dict(handle)
+            self._entries = entries
+            self._write(entries)
+
+    def forget(self, key: str) -> None:
+        """Drop a handle the service no longer accepts (deleted early, or another key's file)."""
+        with self._lock:
+            entries = self._read()
+            entries.update(self._entries or {})
+            entries.pop(key, None)
+            self._entries = entries
+            self._write(entries)
+
+    def _write(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps({"uploads": entries}, indent=2, ensure_ascii=True) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return self._read()
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024.0
+    return f"{value:.1f} GB"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect and prune the pdf_parse Gemini response cache.")
+    parser.add_argument("--cache-dir", help=f"Cache directory (default: {default_cache_dir()}).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show entry count and size.")
+    list_parser = subparsers.add_parser("list", help="List entries, most recently used first.")
+    list_parser.add_argument("--limit", type=int, default=20, help="Number of entries to show (default: 20).")
+    prune_parser = subparsers.add_parser("prune", help="Evict least recently used entries.")
+    prune_parser.add_argument("--max-mb", type=float, help="Shrink the cache to at most this many MB.")
+    prune_parser.add_argument("--older-than-days", type=float, help="Remove entries not used for this many days.")
+    subparsers.add_parser("clear", help="Remove every entry.")
+    uploads_parser = subparsers.add_parser("uploads", help="List live upload handles.")
+    uploads_parser.add_argument("--registry", help=f"Upload registry file (default: {default_upload_registry()}).")
+    args = parser.parse_args()
+
+    cache_dir = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else default_cache_dir()
+    cache = ResponseCache(cache_dir, max_bytes=None)
+
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"Cache: {stats['cache_dir']}")
+        print(f"Entries: {stats['entries']} ({format_bytes(stats['bytes'])})")
+        if stats["entries"]:
+            print(f"Least recently used: {stats['oldest_access']}")
+            print(f"Most recently used: {stats['newest_access']}")
+        return 0
+
+    if args.command == "list":
+        entries = sorted(cache.entries(), key=lambda item: item[2], reverse=True)
+        for path, size, mtime in entries[: max(0, args.limit)]:
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                payload = {}
+            used_at = datetime.fromtimestamp(mtime, timezone.utc).isoformat(timespec="seconds")
+            print(f"{path.stem[:16]}  {format_bytes(size):>10}  {used_at}  {payload.get('model', '?')}")
+        return 0
+
+    if args.command == "prune":
+        if args.max_mb is None and args.older_than_days is None:
+            print("prune needs --max-mb and/or --older-than-days", file=sys.stderr)
+            return 1
+        max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+        older_than = args.older_than_days * 86400.0 if args.older_than_days is not None else None
+        removed, freed = cache.prune(max_bytes=max_bytes, older_than=older_than)
+        print(f"Removed {removed} entries ({format_bytes(freed)}).")
+        return 0
+
+    if args.command == "uploads":
+        registry_path = Path(args.registry).expanduser().resolve() if args.registry else default_upload_registry()
+        uploads = UploadRegistry(registry_path).entries()
+        for key, entry in sorted(uploads.items(), key=lambda item: item[1].get("expires_at", 0)):
+            expires = datetime.fromtimestamp(entry["expires_at"], timezone.utc).isoformat(timespec="seconds")
+            scope = entry.get("scope") or "-"
+            print(
+                f"{key[:16]}  {format_bytes(entry.get('size', 0)):>10}  expires {expires}  scope {scope:<16}  "
+                f"{entry.get('uri', '?')}"
+            )
+        print(f"{len(uploads)} live upload(s) in {registry_path}.")
+        return 0
+
+    removed, freed = cache.prune(max_bytes=0)
+    print(f"Removed {removed} entries ({format_bytes(freed)}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+from typing import Any, Callable, Dict, Optional
+
+from gemini_cache import UploadRegistry
+
+
+# Shared by pdf_parse and the backends it drives (GeminiBackend, fake_gemini).
+INLINE_SIZE_LIMIT = 18 * 1024 * 1024
+# What the service answers for a file it no longer has or that belongs to
+# another key or project.
+STALE_UPLOAD_CODES = (403, 404)
+
+
+class ModelClientError(RuntimeError):
+    """A 4xx from the model service, normalised across backends."""
+
+    def __init__(self, code: int, details: Any, message: str = ""):
+        super().__init__(message or f"Model request failed with HTTP {code}.")
+        self.code = code
+        self.details = details
+
+
+def reuse_or_upload(
+    uploads: Optional[UploadRegistry],
+    image_data: bytes,
+    mime_type: str,
+    upload: Callable[[], Dict[str, Any]],
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """Return a live remote handle for `image_data`, uploading only if needed.
+
+    `refresh` drops the registered handle and uploads again, for when the
+    service rejected the one that was reused.
+    """
+    if uploads is None:
+        return upload()
+    key = uploads.key(image_data, mime_type)
+    if refresh:
+        uploads.forget(key)
+    handle = None if refresh else uploads.get(key)
+    if handle is None:
+        handle = upload()
+        uploads.put(key, dict(handle, size=len(image_data), scope=uploads.scope))
+    return handle
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import posixpath
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from page_state import read_only_uri
+
+
+ARCHIVE_DIRNAME = "packed"
+ARCHIVE_SUFFIX = ".sqlite3"
+
+IMAGE_BLOCK_RE = re.compile(
+    r'<IMAGE\s+source="([^"]+)"\s+bbox="([^"]+)"\s*>\s*'
+    r'!\[([^\]]*)\]\(([^)]+)\)\s*</IMAGE>',
+    re.IGNORECASE,
+)
+PAGE_NUMBER_RE = re.compile(r"page_(\d+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    page INTEGER,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_kind_page ON entries (kind, page);
+"""
+
+
+def archive_path(out_dir: Path, section: str) -> Path:
+    return out_dir / ARCHIVE_DIRNAME / f"{section}{ARCHIVE_SUFFIX}"
+
+
+def page_of(name: str) -> Optional[int]:
+    match = PAGE_NUMBER_RE.search(posixpath.basename(name))
+    return int(match.group(1)) if match else None
+
+
+class SectionArchive:
+    """One section's page Markdown, page images and figure crops in a single SQLite file.
+
+    Entries are keyed by the path the file would have relative to the output
+    directory (`markdown/pages/<section>_page_003.md`, `crops/<section>/...`),
+    so the links pdf_parse writes into the Markdown stay valid, and
+    `extract` rebuilds the loose-file layout exactly. Lookups by name or by
+    (kind, page) go through the table's indexes instead of a directory scan.
+    """
+
+    def __init__(self, path: Path, root: Optional[Path] = None, read_only: bool = False):
+        self.path = path
+        self.root = root if root is not None else path.parent.parent
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(read_only_uri(path), uri=True, timeout=30.0, check_same_thread=False)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def key(self, path: Any) -> str:
+        """Archive name for `path`, an absolute path under the root or a relative name."""
+        path = Path(path)
+        if path.is_absolute():
+            path = path.relative_to(self.root)
+        return path.as_posix()
+
+    def write_bytes(self, path: Any, data: bytes) -> None:
+        name = self.key(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (name, kind, page, size, data, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (name, name.split("/", 1)[0], page_of(name), len(data), sqlite3.Binary(data), time.time()),
+            )
+
+    def write_text(self, path: Any, text: str) -> None:
+        self.write_bytes(path, text.encode("utf-8"))
+
+    def read_bytes(self, path: Any) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM entries WHERE name = ?", (self.key(path),)).fetchone()
+        return bytes(row[0]) if row is not None else None
+
+    def read_text(self, path: Any) -> Optional[str]:
+        data = self.read_bytes(path)
+        return data.decode("utf-8") if data is not None else None
+
+    def exists(self, path: Any) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM entries WHERE name = ?", (self.key(path),)).fetchone()
+        return row is not None
+
+    def names(self, kind: Optional[str] = None, page: Optional[int] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT name, kind, page, size FROM entries WHERE 1 = 1"
+        params: List[Any] = []
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        if page is not None:
+            sql += " AND page = ?"
+            params.append(page)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY kind, page, name", params).fetchall()
+        return [{"name": row[0], "kind": row[1], "page": row[2], "size": row[3]} for row in rows]
+
+    def page_markdown(self, page: int) -> Optional[Dict[str, str]]:
+        """Name and text of a page's Markdown, or None if the page is not in the archive."""
+        entries = [entry for entry in self.names(kind="markdown", page=page) if entry["name"].endswith(".md")]
+        if not entries:
+            return None
+        name = entries[0]["name"]
+        return {"name": name, "text": self.read_text(name) or ""}
+
+    def image_refs(self, page: int) -> List[Dict[str, Any]]:
+        """Resolve the <IMAGE source=... bbox=...> blocks of a page's Markdown.
+
+        Each reference carries the figure label, its normalised bbox, and the
+        archive names of the source page image and the crop (either may be
+        absent from the archive, e.g. page images are only kept on request).
+        """
+        markdown = self.page_markdown(page)
+        if markdown is None:
+            return []
+        base = posixpath.dirname(markdown["name"])
+        refs = []
+        for match in IMAGE_BLOCK_RE.finditer(markdown["text"]):
+            source = posixpath.normpath(posixpath.join(base, match.group(1)))
+            crop = posixpath.normpath(posixpath.join(base, match.group(4)))
+            refs.append(
+                {
+                    "label": match.group(3),
+                    "bbox": [float(value) for value in match.group(2).split(",") if value.strip()],
+                    "source": source,
+                    "crop": crop,
+                    "source_present": self.exists(source),
+                    "crop_present": self.exists(crop),
+                }
+            )
+        return refs
+
+    def extract(self, dest: Path) -> int:
+        """Write every entry to `dest` as the loose file it stands for."""
+        with self._lock:
+            names = [row[0] for row in self._conn.execute("SELECT name FROM entries ORDER BY name")]
+        for name in names:
+            out_path = dest / name
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(self.read_bytes(name) or b"")
+            os.replace(tmp_path, out_path)
+        return len(names)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Read pdf_parse packed section archives.")
+    parser.add_argument("archive", help=f"Section archive (<out-dir>/{ARCHIVE_DIRNAME}/<section>{ARCHIVE_SUFFIX}).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="List entries.")
+    list_parser.add_argument("--page", type=int, help="Only this page.")
+    show_parser = subparsers.add_parser("show", help="Print a page's Markdown and its resolved image references.")
+    show_parser.add_argument("page", type=int)
+    extract_parser = subparsers.add_parser("extract", help="Unpack into the loose-file layout.")
+    extract_parser.add_argument("--dest", help="Output directory (default: the archive's output directory).")
+    args = parser.parse_args()
+
+    path = Path(args.archive).expanduser().resolve()
+    if not path.exists():
+        print(f"Archive not found: {path}", file=sys.stderr)
+        return 1
+    # Every subcommand only reads the archive; extract writes loose files elsewhere.
+    archive = SectionArchive(path, read_only=True)
+
+    if args.command == "list":
+        entries = archive.names(page=args.page)
+        for entry in entries:
+            print(f"{entry['size']:>10}  {entry['name']}")
+        print(f"{len(entries)} entr{'y' if len(entries) == 1 else 'ies'}.")
+        return 0
+
+    if args.command == "show":
+        markdown = archive.page_markdown(args.page)
+        if markdown is None:
+            print(f"Page {args.page} not in {path}", file=sys.stderr)
+            return 1
+        print(markdown["text"].rstrip())
+        for ref in archive.image_refs(args.page):
+            crop_state = "" if ref["crop_present"] else " (missing)"
+            print(f"# {ref['label']}: bbox {ref['bbox']} crop {ref['crop']}{crop_state}", file=sys.stderr)
+        return 0
+
+    dest = Path(args.dest).expanduser().resolve() if args.dest else archive.root
+    print(f"Extracted {archive.extract(dest)} file(s) to {dest}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+STATE_FILENAME = "parse_state.sqlite3"
+DEFAULT_CLAIM_LEASE_S = 600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    section TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    claimed_at REAL,
+    completed_at REAL,
+    input_hash TEXT,
+    model TEXT,
+    route TEXT,
+    request_s REAL,
+    markdown_path TEXT,
+    image_records TEXT,
+    metrics TEXT,
+    error TEXT,
+    PRIMARY KEY (section, page)
+);
+CREATE INDEX IF NOT EXISTS pages_section_status ON pages (section, status);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    worker TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT NOT NULL,
+    settings TEXT
+);
+"""
+
+
+def read_only_uri(db_path: Path) -> str:
+    """SQLite URI that reads `db_path` without creating or changing any file.
+
+    A WAL database opened with mode=ro still gets -wal/-shm files created next
+    to it. With no -wal file there is nothing uncheckpointed to read, so the
+    database is opened immutable; otherwise a writer is (or was) active, the
+    files already exist, and mode=ro sees its committed pages.
+    """
+    wal_path = db_path.with_name(db_path.name + "-wal")
+    mode = "mode=ro" if wal_path.exists() else "immutable=1"
+    return f"{db_path.resolve().as_uri()}?{mode}"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class PageStateStore:
+    """Per-page parse state in a SQLite database next to the outputs.
+
+    Each page row moves from `claimed` to `done` (or `failed`) as soon as its
+    Markdown is written, with the input hash, model, timings and crop records,
+    so a resumed run needs one indexed query instead of re-reading every page
+    file. Claims carry a lease: several processes sharing an output directory
+    each take pages nobody else holds, and a crashed worker's pages become
+    claimable again once its lease runs out.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        worker_id: Optional[str] = None,
+        lease_s: float = DEFAULT_CLAIM_LEASE_S,
+        read_only: bool = False,
+    ):
+        """Open (creating if needed) the store; `read_only` opens an existing one without touching it."""
+        self.db_path = db_path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_s = lease_s
+        self._lock = threading.Lock()
+        if read_only:
+            # No journal-mode switch or schema DDL: the file is left as it is.
+            self._conn = sqlite3.connect(read_only_uri(db_path), uri=True, timeout=30.0, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+        else:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(db_path), timeout=30.0, isolation_level=None, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "metrics" not in columns and not read_only:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN metrics TEXT")
+            columns.add("metrics")
+        self._has_metrics = "metrics" in columns
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params))
+
+    def has_section(self, section: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM pages WHERE section = ? LIMIT 1", (section,)).fetchone()
+        return row is not None
+
+    def completed_pages(self, section: str) -> Dict[int, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, markdown_path, image_records, model, input_hash, route FROM pages "
+                "WHERE section = ? AND status = 'done'",
+                (section,),
+            ).fetchall()
+        return {
+            row["page"]: {
+                "markdown_path": row["markdown_path"],
+                "image_records": json.loads(row["image_records"] or "[]"),
+                "model": row["model"],
+                "input_hash": row["input_hash"],
+                "route": row["route"],
+            }
+            for row in rows
+        }
+
+    def claim(self, section: str, pages: List[int], include_done: bool = False) -> bool:
+        """Claim every page in `pages` for this worker, or none of them.
+
+        Pages held by another worker under a live lease block the claim, as do
+        pages already done unless `include_done` is set (--force).
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                placeholders = ",".join("?" for _ in pages)
+                rows = self._conn.execute(
+                    f"SELECT page, status, worker, claimed_at FROM pages WHERE section = ? AND page IN ({placeholders})",
+                    (section, *pages),
+                ).fetchall()
+                for row in rows:
+                    if row["status"] == "done" and not include_done:
+                        self._conn.execute("ROLLBACK")
+                        return False
+                    held = (
+                        row["status"] == "claimed"
+                        and row["worker"] != self.worker_id
+                        and now - (row["claimed_at"] or 0.0) < self.lease_s
+                    )
+                    if held:
+                        self._conn.execute("ROLLBACK")
+                        return False
+                self._conn.executemany(
+                    "INSERT INTO pages (section, page, status, worker, claimed_at) VALUES (?, ?, 'claimed', ?, ?) "
+                    "ON CONFLICT (section, page) DO UPDATE SET status = 'claimed', worker = excluded.worker, "
+                    "claimed_at = excluded.claimed_at, error = NULL",
+                    [(section, page, self.worker_id, now) for page in pages],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def mark_done(
+        self,
+        section: str,
+        page: int,
+        markdown_path: Path,
+        image_records: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        input_hash: Optional[str] = None,
+        route: str = "model",
+        request_s: Optional[float] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self._write(
+            "INSERT INTO pages (section, page, status, worker, completed_at, input_hash, model, route, request_s, "
+            "markdown_path, image_records, metrics) VALUES (?, ?, 'done', ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (section, page) DO UPDATE SET status = 'done', worker = excluded.worker, "
+            "completed_at = excluded.completed_at, input_hash = excluded.input_hash, model = excluded.model, "
+            "route = excluded.route, request_s = excluded.request_s, markdown_path = excluded.markdown_path, "
+            "image_records = excluded.image_records, metrics = excluded.metrics, error = NULL",
+            (
+                section,
+                page,
+                self.worker_id,
+                time.time(),
+                input_hash,
+                model,
+                route,
+                request_s,
+                str(markdown_path),
+                json.dumps(image_records, ensure_ascii=True),
+                json.dumps(metrics, ensure_ascii=True) if metrics is not None else None,
+            ),
+        )
+
+    def mark_failed(self, section: str, pages: List[int], error: str) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE pages SET status = 'failed', error = ? WHERE section = ? AND page = ? AND worker = ? "
+                "AND status = 'claimed'",
+                [(error, section, page, self.worker_id) for page in pages],
+            )
+
+    def release(self, section: str) -> int:
+        """Drop this worker's unfinished claims so other workers can pick them up."""
+        cursor = self._write(
+            "DELETE FROM pages WHERE section = ? AND worker = ? AND status = 'claimed'",
+            (section, self.worker_id),
+        )
+        return cursor.rowcount
+
+    def start_run(self, settings: Dict[str, Any]) -> int:
+        cursor = self._write(
+            "INSERT INTO runs (worker, started_at, status, settings) VALUES (?, ?, 'running', ?)",
+            (self.worker_id, time.time(), json.dumps(settings, ensure_ascii=True, default=str)),
+        )
+        return int(cursor.lastrowid)
+
+    def finish_run(self, run_id: int, status: str) -> None:
+        self._write("UPDATE runs SET finished_at = ?, status = ? WHERE run_id = ?", (time.time(), status, run_id))
+
+    def failed_pages(self, section: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT section, page, error FROM pages WHERE status = 'failed'"
+        params: tuple = ()
+        if section:
+            sql += " AND section = ?"
+            params = (section,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY section, page", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def reset(self, section: Optional[str] = None) -> int:
+        """Forget claims and failures (of any worker) so those pages are retried."""
+        sql = "DELETE FROM pages WHERE status IN ('claimed', 'failed')"
+        params: tuple = ()
+        if section:
+            sql += " AND section = ?"
+            params = (section,)
+        return self._write(sql, params).rowcount
+
+    def output_tokens_per_page(self) -> Optional[float]:
+        """Average output tokens per model-parsed page, from recorded call metrics."""
+        if not self._has_metrics:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT metrics FROM pages WHERE status = 'done' AND route = 'model' AND metrics IS NOT NULL"
+            ).fetchall()
+        samples = []
+        for row in rows:
+            metrics = json.loads(row["metrics"])
+            if metrics.get("output_tokens"):
+                # Tile calls are shared by job_pages pages; their tokens are per call.
+                samples.append(metrics["output_tokens"] / max(1, metrics.get("job_pages") or 1))
+        return sum(samples) / len(samples) if samples else None
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT section, status, COUNT(*) AS count FROM pages GROUP BY section, status ORDER BY section"
+            ).fetchall()
+        results: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            results.setdefault(row["section"], {})[row["status"]] = row["count"]
+        return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect the pdf_parse per-page state store.")
+    parser.add_argument("out_dir", help="pdf_parse output directory.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Page counts per section and status.")
+    failed_parser = subparsers.add_parser("failed", help="List failed pages with their errors.")
+    failed_parser.add_argument("--section", help="Only this section.")
+    reset_parser = subparsers.add_parser("reset", help="Forget claims and failures so pages are retried.")
+    reset_parser.add_argument("--section", help="Only this section.")
+    args = parser.parse_args()
+
+    db_path = Path(args.out_dir).expanduser().resolve() / STATE_FILENAME
+    if not db_path.exists():
+        print(f"No state store at {db_path}", file=sys.stderr)
+        return 1
+    store = PageStateStore(db_path, read_only=args.command != "reset")
+
+    if args.command == "status":
+        for section, counts in store.summary().items():
+            parts = ", ".join(f"{status} {count}" for status, count in sorted(counts.items()))
+            print(f"{section}: {parts}")
+        return 0
+
+    if args.command == "failed":
+        for row in store.failed_pages(args.section):
+            print(f"{row['section']} page {row['page']}: {row['error']}")
+        return 0
+
+    print(f"Reset {store.reset(args.section)} page(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
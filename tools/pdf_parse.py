@@ -1,34 +1,84 @@
 #!/usr/bin/env python3
 import argparse
+import collections
+import hashlib
+import io
 import json
+import math
+import multiprocessing
 import os
+import queue
 import re
 import sys
+import struct
+import threading
 import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import fitz  # PyMuPDF
-from PIL import Image, ImageDraw, ImageFont
-
-try:
-    from google import genai
-    from google.genai import types
-    from google.genai import errors as genai_errors
-except ImportError:  # pragma: no cover - runtime dependency
-    genai = None
-    types = None
-    genai_errors = None
-try:
-    from tqdm import tqdm
-except ImportError:  # pragma: no cover - optional dependency
-    tqdm = None
-
-
-INLINE_SIZE_LIMIT = 18 * 1024 * 1024
+from PIL import Image, ImageChops, ImageDraw, ImageFont, ImageStat
+
+from fake_gemini import LATENCY_DISTRIBUTIONS, FakeBackend
+from gemini_cache import (
+    DEFAULT_MAX_BYTES,
+    UPLOAD_TTL_S,
+    ResponseCache,
+    UploadRegistry,
+    credential_fingerprint,
+    default_cache_dir,
+    default_upload_registry,
+)
+from model_client import INLINE_SIZE_LIMIT, STALE_UPLOAD_CODES, ModelClientError, reuse_or_upload
+from page_archive import IMAGE_BLOCK_RE, SectionArchive, archive_path
+from page_state import DEFAULT_CLAIM_LEASE_S, STATE_FILENAME, PageStateStore
+
+# google-genai and tqdm are slow to import and only needed when parsing, so
+# they load on first use (load_genai / load_tqdm) rather than here.
+genai: Any = None
+types: Any = None
+genai_errors: Any = None
+_tqdm: Any = None
+
+
 BBOX_ORDER = "ymin,xmin,ymax,xmax"
 RATE_LIMIT_RETRIES = 3
+MALFORMED_RETRIES = 1
+# PyMuPDF is not thread-safe; pipeline and section threads hold this around
+# every Document call.
+FITZ_LOCK = threading.Lock()
+# Render workers are spawned, not forked: a fork taken while pipeline threads
+# hold FITZ_LOCK or other locks would copy them locked into the child.
+PROCESS_CONTEXT = multiprocessing.get_context("spawn")
+IMAGE_TOKEN_TILE = 768
+TOKENS_PER_IMAGE_TILE = 258
+TILE_BAND_HEIGHT = 40
+TILE_LAYOUTS = ("vertical", "grid")
+TILE_COMPOSE_MODES = ("canvas", "strips")
+LOCAL_MIN_TEXT_CHARS = 200
+LOCAL_MAX_IMAGE_RATIO = 0.02
+LOCAL_MAX_DRAWINGS = 20
+LOCAL_MAX_DRAWING_RATIO = 0.05
+LOCAL_MAX_MATH_CHARS = 5
+MATH_FONT_HINTS = ("math", "cmmi", "cmsy", "cmex", "msbm", "msam", "symbol", "stix", "esint")
+BULLET_CHARS = "•◦▪‣●"
+DEDUP_THUMB_DPI = 36
+DEDUP_HASH_SIZE = 16
+DEDUP_INK_LEVEL = 160
+BLANK_MAX_INK_RATIO = 0.001
+DEDUP_MAX_PIXEL_DIFF = 4.0
+DEFAULT_DEDUP_DISTANCE = 6
+# Stages that measure waiting rather than work; never reported as the bottleneck.
+WAIT_STAGES = ("gate", "retry")
+UPLOAD_FORMATS = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
 
 
 def slugify(text: str) -> str:
@@ -52,8 +102,33 @@ def load_api_key(explicit_key: Optional[str]) -> Optional[str]:
     return os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
 
 
+def load_genai() -> bool:
+    global genai, types, genai_errors
+    if genai is None:
+        try:
+            from google import genai as genai_module
+            from google.genai import errors as errors_module
+            from google.genai import types as types_module
+        except ImportError:  # pragma: no cover - runtime dependency
+            return False
+        genai, types, genai_errors = genai_module, types_module, errors_module
+    return True
+
+
+def load_tqdm() -> Any:
+    global _tqdm
+    if _tqdm is None:
+        try:
+            from tqdm import tqdm
+        except ImportError:  # pragma: no cover - optional dependency
+            _tqdm = False
+        else:
+            _tqdm = tqdm
+    return _tqdm or None
+
+
 def ensure_genai() -> None:
-    if genai is None or types is None:
+    if not load_genai():
         print("Missing google-genai. Install with: pip install google-genai", file=sys.stderr)
         raise SystemExit(1)
 
@@ -62,7 +137,82 @@ class GeminiRateLimitError(RuntimeError):
     pass
 
 
-def progress_iter(iterable: Any, desc: Optional[str] = None, unit: Optional[str] = None) -> Any:
+class MalformedResponseError(RuntimeError):
+    """The model kept answering with an empty or unparsable body."""
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, shared by every worker.
+
+    A 429 carrying a retryDelay calls `pause`, which holds back all callers of
+    `acquire` until the delay has elapsed, not just the worker that was throttled.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._request_bucket = float(requests_per_minute or 0)
+        self._token_bucket = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._request_bucket = min(
+                float(self.requests_per_minute),
+                self._request_bucket + elapsed * self.requests_per_minute / 60.0,
+            )
+        if self.tokens_per_minute:
+            self._token_bucket = min(
+                float(self.tokens_per_minute),
+                self._token_bucket + elapsed * self.tokens_per_minute / 60.0,
+            )
+
+    def _take(self, tokens: int) -> float:
+        """Take one request (and `tokens`) if available; otherwise return the wait."""
+        if self.tokens_per_minute:
+            tokens = min(tokens, int(self.tokens_per_minute))
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._paused_until - now
+            if wait <= 0:
+                if self.requests_per_minute and self._request_bucket < 1:
+                    wait = (1 - self._request_bucket) * 60.0 / self.requests_per_minute
+                if self.tokens_per_minute and self._token_bucket < tokens:
+                    wait = max(wait, (tokens - self._token_bucket) * 60.0 / self.tokens_per_minute)
+            if wait <= 0:
+                if self.requests_per_minute:
+                    self._request_bucket -= 1
+                if self.tokens_per_minute:
+                    self._token_bucket -= tokens
+            return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        while True:
+            wait = self._take(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        return self._take(tokens) <= 0
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def progress_iter(
+    iterable: Any,
+    desc: Optional[str] = None,
+    unit: Optional[str] = None,
+    total: Optional[int] = None,
+) -> Any:
+    tqdm = load_tqdm()
     if tqdm is None:
         return iterable
     kwargs: Dict[str, Any] = {}
@@ -70,9 +220,418 @@ def progress_iter(iterable: Any, desc: Optional[str] = None, unit: Optional[str]
         kwargs["desc"] = desc
     if unit:
         kwargs["unit"] = unit
+    if total is not None:
+        kwargs["total"] = total
     return tqdm(iterable, **kwargs)
 
 
+class StageStats:
+    """Thread-safe busy-time and item counters for each pipeline stage.
+
+    Plain counters (tokens, requests, retries) ride along so one summary
+    carries both where the time went and what the run consumed.
+
+    Stages are exclusive: time spent in a stage timed (or recorded) inside
+    another on the same thread is charged to the inner stage only, so
+    `request` is the call overhead around upload/model/parse and `write` is
+    the writing around crop. Busy times therefore add up without counting
+    any second twice.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started = time.perf_counter()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, int] = {}
+        self._peaks: Dict[str, int] = {}
+
+    def _stage(self, stage: str) -> Dict[str, float]:
+        return self._stages.setdefault(stage, {"items": 0, "busy_s": 0.0, "workers": 1})
+
+    def set_workers(self, stage: str, workers: int) -> None:
+        with self._lock:
+            self._stage(stage)["workers"] = max(1, workers)
+
+    def _frames(self) -> List[List[float]]:
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def record(self, stage: str, seconds: float, items: int = 1) -> None:
+        frames = self._frames()
+        if frames:
+            frames[-1][0] += seconds
+        with self._lock:
+            entry = self._stage(stage)
+            entry["items"] += items
+            entry["busy_s"] += seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def peak(self, name: str, value: int) -> None:
+        with self._lock:
+            self._peaks[name] = max(self._peaks.get(name, 0), value)
+
+    @contextmanager
+    def timed(self, stage: str, items: int = 1) -> Iterator[None]:
+        frames = self._frames()
+        nested = [0.0]
+        frames.append(nested)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            frames.pop()
+            self.record(stage, max(0.0, elapsed - nested[0]), items)
+            if frames:
+                # The enclosing stage loses the whole span, not just our share.
+                frames[-1][0] += nested[0]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            wall = time.perf_counter() - self._started
+            stages: Dict[str, Any] = {}
+            for stage, entry in self._stages.items():
+                if not entry["items"] and not entry["busy_s"]:
+                    continue
+                busy = entry["busy_s"]
+                workers = int(entry["workers"])
+                stages[stage] = {
+                    "items": int(entry["items"]),
+                    "busy_s": round(busy, 3),
+                    "workers": workers,
+                    "items_per_s": round(entry["items"] * workers / busy, 3) if busy > 0 else None,
+                    "utilization": round(busy / (wall * workers), 3) if wall > 0 else None,
+                }
+            counters = dict(sorted(self._counters.items()))
+            peaks = dict(sorted(self._peaks.items()))
+        return {"wall_s": round(wall, 3), "stages": stages, "counters": counters, "peaks": peaks}
+
+    def report(self, label: str) -> None:
+        summary = self.summary()
+        if not summary["stages"]:
+            return
+        print(f"Stage throughput for {label} (wall {summary['wall_s']:.1f}s):")
+        working = {stage: entry for stage, entry in summary["stages"].items() if stage not in WAIT_STAGES}
+        busiest = max(working.items(), key=lambda item: item[1]["utilization"] or 0)[0] if working else None
+        for stage, entry in summary["stages"].items():
+            rate = f"{entry['items_per_s']:.2f}/s" if entry["items_per_s"] is not None else "-"
+            marker = "  <- bottleneck" if stage == busiest and len(working) > 1 else ""
+            print(
+                f"  {stage:<8} {entry['items']:>5} items  busy {entry['busy_s']:>8.1f}s  "
+                f"x{entry['workers']:<2} capacity {rate:>9}  util {entry['utilization'] or 0:>6.1%}{marker}"
+            )
+        if summary["counters"]:
+            print("  " + ", ".join(f"{name} {value}" for name, value in summary["counters"].items()))
+        if summary["peaks"]:
+            print("  peak " + ", ".join(f"{name} {value / 1e6:.1f} MB" for name, value in summary["peaks"].items()))
+
+
+def usage_tokens(response: Any) -> Dict[str, int]:
+    """Input/output token counts from a response's usage metadata, if any."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    if not isinstance(usage, dict):
+        usage = {
+            key: getattr(usage, key, None)
+            for key in ("prompt_token_count", "candidates_token_count", "thoughts_token_count")
+        }
+    tokens = {
+        "input_tokens": usage.get("prompt_token_count") or 0,
+        "output_tokens": (usage.get("candidates_token_count") or 0) + (usage.get("thoughts_token_count") or 0),
+    }
+    return {key: int(value) for key, value in tokens.items()}
+
+
+def prometheus_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def run_totals(sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum stage busy time and counters over a run's sections."""
+    stage_busy: Dict[str, float] = {}
+    counters: Dict[str, int] = {}
+    peaks: Dict[str, int] = {}
+    for section in sections:
+        summary = section.get("stage_stats") or {}
+        for stage, entry in (summary.get("stages") or {}).items():
+            stage_busy[stage] = round(stage_busy.get(stage, 0.0) + entry["busy_s"], 3)
+        for name, value in (summary.get("counters") or {}).items():
+            counters[name] = counters.get(name, 0) + value
+        for name, value in (summary.get("peaks") or {}).items():
+            peaks[name] = max(peaks.get(name, 0), value)
+    return {
+        "pages": sum(section.get("pages", 0) for section in sections),
+        "stage_busy_s": stage_busy,
+        "counters": counters,
+        "peaks": peaks,
+    }
+
+
+def format_prometheus(run_info: Dict[str, Any]) -> str:
+    """Render a parse run's stage stats and counters in Prometheus text format."""
+    metrics: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def add(name: str, kind: str, help_text: str, labels: Dict[str, Any], value: Any) -> None:
+        entry = metrics.setdefault(name, (kind, help_text, []))
+        label_text = ",".join(f'{key}="{prometheus_label(item)}"' for key, item in labels.items())
+        entry[2].append(f"{name}{{{label_text}}} {value}")
+
+    for section in run_info.get("sections", []):
+        base = {"section": section["section"], "model": run_info.get("model", "")}
+        summary = section.get("stage_stats") or {}
+        add("pdf_parse_pages", "gauge", "Pages in the section.", base, section.get("pages", 0))
+        add("pdf_parse_wall_seconds", "gauge", "Wall time spent on the section.", base, summary.get("wall_s", 0))
+        for stage, entry in (summary.get("stages") or {}).items():
+            labels = dict(base, stage=stage)
+            add("pdf_parse_stage_busy_seconds", "gauge", "Busy time per stage.", labels, entry["busy_s"])
+            add("pdf_parse_stage_items", "gauge", "Items handled per stage.", labels, entry["items"])
+        for name, value in (summary.get("counters") or {}).items():
+            add(f"pdf_parse_{name}_total", "counter", f"{name.replace('_', ' ').capitalize()}.", base, value)
+        for name, value in (summary.get("peaks") or {}).items():
+            add(f"pdf_parse_peak_{name}", "gauge", f"Peak {name.replace('_', ' ')}.", base, value)
+    lines: List[str] = []
+    for name, (kind, help_text, samples) in metrics.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+class HedgePolicy:
+    """When and how often to send a duplicate of a slow model call.
+
+    Latencies of successful calls are kept in a sliding window. Once a call
+    has run longer than the `percentile` of that window, one hedge request is
+    sent, provided hedges stay under `budget` times the number of primary
+    calls. Whichever call answers first wins; the SDK offers no way to abort
+    the other, which is still billed, so its usage is counted separately as
+    hedge_input_tokens/hedge_output_tokens when it finishes. Calls run on the
+    policy's own thread pool so the caller can stop waiting on a straggler.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget: float = 0.1,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 16,
+    ):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self._latencies: "collections.deque[float]" = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.primaries = 0
+        self.hedges = 0
+        self.wins = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+
+    def start_primary(self) -> None:
+        with self._lock:
+            self.primaries += 1
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.primaries:
+                return False
+            self.hedges += 1
+            return True
+
+    def refund(self) -> None:
+        with self._lock:
+            self.hedges -= 1
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.wins += 1
+
+    def summary(self) -> Dict[str, Any]:
+        delay = self.delay()
+        with self._lock:
+            return {
+                "percentile": self.percentile,
+                "budget": self.budget,
+                "primaries": self.primaries,
+                "hedges": self.hedges,
+                "wins": self.wins,
+                "delay_s": round(delay, 3) if delay is not None else None,
+            }
+
+    def shutdown(self) -> None:
+        # Losing calls may still be running; don't wait for them.
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def generate_hedged(
+    backend: Any,
+    model: str,
+    contents: List[Any],
+    hedge: HedgePolicy,
+    limiter: Optional[RateLimiter] = None,
+    estimated_tokens: int = 0,
+    stats: Optional[StageStats] = None,
+) -> Any:
+    """backend.generate with at most one hedge request once the call runs long.
+
+    The primary call must already have been admitted by the limiter; the
+    hedge is only sent if the limiter has room right now, so hedging never
+    delays queued primary calls.
+    """
+
+    def timed_generate() -> Any:
+        started = time.perf_counter()
+        response = backend.generate(model, contents)
+        hedge.observe(time.perf_counter() - started)
+        return response
+
+    def count_loser(future: Any) -> None:
+        if stats is None or future.cancelled() or future.exception() is not None:
+            return
+        for key, value in usage_tokens(future.result()).items():
+            stats.count(f"hedge_{key}", value)
+
+    hedge.start_primary()
+    primary = hedge.executor.submit(timed_generate)
+    delay = hedge.delay()
+    if delay is None:
+        return primary.result()
+    done, _pending = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+    if not hedge.try_spend():
+        return primary.result()
+    if limiter is not None and not limiter.try_acquire(estimated_tokens):
+        hedge.refund()
+        return primary.result()
+    if stats is not None:
+        stats.count("hedges")
+    secondary = hedge.executor.submit(timed_generate)
+    pending = {primary, secondary}
+    first_error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                first_error = first_error or future.exception()
+                continue
+            if future is secondary:
+                hedge.record_win()
+                if stats is not None:
+                    stats.count("hedge_wins")
+            (secondary if future is primary else primary).add_done_callback(count_loser)
+            return future.result()
+    assert first_error is not None
+    raise first_error
+
+
+def iter_pipeline_results(
+    jobs: List[Any],
+    prepare: Callable[[Any], Any],
+    request: Callable[[Any, Any], Any],
+    prepare_workers: int,
+    request_workers: int,
+    max_in_flight: int,
+) -> Iterator[Tuple[Any, Any]]:
+    """Stream jobs through prepare -> request and yield (job, result) in job order.
+
+    `prepare` (render/tile) and `request` (model call) run on their own worker
+    threads. At most `max_in_flight` jobs exist between the start of `prepare`
+    and the caller consuming the result, which caps the images held on disk or
+    in memory while the consumer (crop/write) lags behind.
+
+    Closing the generator (or a consumer error propagating through it) stops
+    the workers: no further jobs are prepared or sent, and the threads are
+    joined once their in-flight calls return. Callers should close it in a
+    `finally` so an exception in their loop body cannot leak workers.
+    """
+    request_workers = max(request_workers, 1)
+    slots = threading.BoundedSemaphore(max(max_in_flight, 1))
+    stop = threading.Event()
+    ready: "queue.Queue[Optional[Tuple[int, Any, Any]]]" = queue.Queue()
+    results: Dict[int, Tuple[bool, Any]] = {}
+    results_ready = threading.Condition()
+
+    def deliver(index: int, ok: bool, value: Any) -> None:
+        with results_ready:
+            results[index] = (ok, value)
+            results_ready.notify_all()
+
+    def prepare_one(index: int, job: Any) -> None:
+        if stop.is_set():
+            return
+        try:
+            ready.put((index, job, prepare(job)))
+        except BaseException as exc:
+            deliver(index, False, exc)
+
+    def produce() -> None:
+        executor = ThreadPoolExecutor(max_workers=max(prepare_workers, 1))
+        try:
+            for index, job in enumerate(jobs):
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                executor.submit(prepare_one, index, job)
+        finally:
+            # On an early stop, queued prepares are dropped instead of rendered.
+            executor.shutdown(wait=True, cancel_futures=stop.is_set())
+            for _ in range(request_workers):
+                ready.put(None)
+
+    def consume_requests() -> None:
+        while True:
+            item = ready.get()
+            if item is None:
+                return
+            index, job, prepared = item
+            if stop.is_set():
+                continue
+            try:
+                deliver(index, True, request(job, prepared))
+            except BaseException as exc:
+                deliver(index, False, exc)
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [threading.Thread(target=consume_requests, daemon=True) for _ in range(request_workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        for index, job in enumerate(jobs):
+            with results_ready:
+                while index not in results:
+                    results_ready.wait()
+                ok, value = results.pop(index)
+            if not ok:
+                raise value
+            yield job, value
+            slots.release()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
 def extract_retry_delay(details: Any) -> Optional[float]:
     if not isinstance(details, dict):
         return None
@@ -155,84 +714,755 @@ def normalize_bbox(bbox: List[float], width: int, height: int) -> Tuple[int, int
     return x0, y0, x1, y1
 
 
-def render_pages(doc: fitz.Document, images_dir: Path, dpi: int, force: bool) -> List[Path]:
-    images_dir.mkdir(parents=True, exist_ok=True)
+def save_page_png(doc: fitz.Document, index: int, out_path: Path, matrix: fitz.Matrix) -> None:
+    page = doc.load_page(index)
+    pix = page.get_pixmap(matrix=matrix, alpha=False)
+    pix.save(out_path)
+
+
+def open_section(pdf_path: Any, page_range: Optional[Tuple[int, int]] = None) -> fitz.Document:
+    """Open a PDF, narrowed in memory to the 1-based inclusive `page_range` if given.
+
+    This is how page-range sections from a pdf_split manifest are read straight
+    from the source document: page indices become section-relative and no
+    section PDF is ever written.
+    """
+    doc = fitz.open(pdf_path)
+    if page_range is not None:
+        doc.select(list(range(page_range[0] - 1, page_range[1])))
+    return doc
+
+
+def render_page_range(
+    pdf_path: str, indices: List[int], images_dir: Path, dpi: int, page_range: Optional[Tuple[int, int]] = None
+) -> int:
+    """Render the given 0-based page indices with a private document handle."""
     scale = dpi / 72.0
     matrix = fitz.Matrix(scale, scale)
-    image_paths: List[Path] = []
-    for index in progress_iter(range(doc.page_count), desc="Rendering pages", unit="page"):
-        filename = f"page_{index + 1:03d}.png"
-        out_path = images_dir / filename
-        if not force and out_path.exists() and out_path.stat().st_size > 0:
-            image_paths.append(out_path)
-            continue
-        page = doc.load_page(index)
-        pix = page.get_pixmap(matrix=matrix, alpha=False)
-        pix.save(out_path)
-        image_paths.append(out_path)
+    doc = open_section(pdf_path, page_range)
+    try:
+        for index in indices:
+            save_page_png(doc, index, images_dir / f"page_{index + 1:03d}.png", matrix)
+    finally:
+        doc.close()
+    return len(indices)
+
+
+def page_image_missing(path: Path) -> bool:
+    return not path.exists() or path.stat().st_size == 0
+
+
+def render_pages(
+    doc: fitz.Document,
+    images_dir: Path,
+    dpi: int,
+    force: bool,
+    workers: int = 1,
+    stats: Optional[StageStats] = None,
+    page_range: Optional[Tuple[int, int]] = None,
+    indices: Optional[List[int]] = None,
+) -> List[Path]:
+    """Render page PNGs that are missing (or all with `force`), limited to the 0-based `indices` if given."""
+    images_dir.mkdir(parents=True, exist_ok=True)
+    image_paths = [images_dir / f"page_{index + 1:03d}.png" for index in range(doc.page_count)]
+    wanted = range(doc.page_count) if indices is None else indices
+    pending = [index for index in wanted if force or page_image_missing(image_paths[index])]
+    if not pending:
+        return image_paths
+
+    started = time.perf_counter()
+    if workers <= 1 or len(pending) < 2 or not doc.name:
+        workers = 1
+        scale = dpi / 72.0
+        matrix = fitz.Matrix(scale, scale)
+        for index in progress_iter(pending, desc="Rendering pages", unit="page"):
+            with FITZ_LOCK:
+                save_page_png(doc, index, image_paths[index], matrix)
+    else:
+        # Contiguous slices keep each worker's document cache warm; using a few
+        # slices per worker keeps the progress bar moving and balances the load.
+        slice_count = min(len(pending), workers * 4)
+        slice_size = math.ceil(len(pending) / slice_count)
+        slices = [pending[i : i + slice_size] for i in range(0, len(pending), slice_size)]
+        bar = progress_iter(None, desc="Rendering pages", unit="page", total=len(pending))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_CONTEXT) as executor:
+            futures = [
+                executor.submit(render_page_range, doc.name, chunk, images_dir, dpi, page_range) for chunk in slices
+            ]
+            for future in as_completed(futures):
+                rendered = future.result()
+                if bar is not None:
+                    bar.update(rendered)
+        if bar is not None:
+            bar.close()
+    elapsed = time.perf_counter() - started
+    if stats is not None:
+        stats.set_workers("render", workers)
+        stats.record("render", elapsed * workers, len(pending))
+    rate = len(pending) / elapsed if elapsed > 0 else float("inf")
+    print(f"Rendered {len(pending)} pages in {elapsed:.1f}s ({rate:.1f} pages/s, {workers} worker(s)).")
     return image_paths
 
 
+def is_math_char(char: str) -> bool:
+    code = ord(char)
+    return (
+        0x0370 <= code <= 0x03FF  # Greek
+        or 0x2200 <= code <= 0x22FF  # mathematical operators
+        or 0x27C0 <= code <= 0x27EF
+        or 0x2980 <= code <= 0x2AFF
+        or 0x1D400 <= code <= 0x1D7FF  # mathematical alphanumerics
+        or char in "∫∑∏√∞≈≠≤≥±×÷∂∇"
+    )
+
+
+def page_text_spans(text_dict: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for block in text_dict.get("blocks", []):
+        if block.get("type") != 0:
+            continue
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                yield span
+
+
+def classify_page(page: fitz.Page, text_dict: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Decide whether a page can be converted from its text layer or needs the model.
+
+    Pages with figures, vector drawings, equations, mixed scripts (bilingual
+    pairs) or no usable text layer (scans) go to Gemini; plain prose and blank
+    pages are handled locally.
+    """
+    if text_dict is None:
+        text_dict = page.get_text("dict", sort=True)
+    page_area = max(1.0, page.rect.width * page.rect.height)
+    image_area = 0.0
+    for block in text_dict.get("blocks", []):
+        if block.get("type") == 1:
+            x0, y0, x1, y1 = block["bbox"]
+            image_area += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+
+    text_chars = 0
+    math_chars = 0
+    latin_letters = 0
+    other_letters = 0
+    fonts: Dict[str, int] = {}
+    for span in page_text_spans(text_dict):
+        text = span.get("text", "")
+        visible = len(text.strip())
+        if not visible:
+            continue
+        text_chars += visible
+        font = str(span.get("font", ""))
+        fonts[font] = fonts.get(font, 0) + visible
+        if any(hint in font.lower() for hint in MATH_FONT_HINTS):
+            math_chars += visible
+            continue
+        for char in text:
+            if is_math_char(char):
+                math_chars += 1
+            elif char.isalpha():
+                if ord(char) < 0x250:
+                    latin_letters += 1
+                else:
+                    other_letters += 1
+    paths = page.get_drawings()
+    drawings = len(paths)
+    # A figure can be a few large filled paths, so the count alone is not
+    # enough. Unfilled or white paths only count when stroked and smaller
+    # than the page, which leaves out page backgrounds and frames.
+    drawing_area = 0.0
+    for path in paths:
+        rect = fitz.Rect(path["rect"]) & page.rect
+        area = max(0.0, rect.width) * max(0.0, rect.height)
+        if path.get("fill") in (None, (1.0, 1.0, 1.0)):
+            if path.get("color") is None or area > 0.75 * page_area:
+                continue
+        drawing_area += area
+    drawing_ratio = min(1.0, drawing_area / page_area)
+    image_ratio = image_area / page_area
+    letters = latin_letters + other_letters
+
+    features = {
+        "text_chars": text_chars,
+        "image_area_ratio": round(image_ratio, 4),
+        "drawings": drawings,
+        "drawing_area_ratio": round(drawing_ratio, 4),
+        "math_chars": math_chars,
+        "fonts": len(fonts),
+    }
+    if text_chars == 0 and image_area == 0 and drawings == 0:
+        route, reason = "local", "blank"
+    elif image_ratio > 0.5 and text_chars < LOCAL_MIN_TEXT_CHARS:
+        route, reason = "model", "scanned"
+    elif image_ratio > LOCAL_MAX_IMAGE_RATIO:
+        route, reason = "model", "figure"
+    elif drawings > LOCAL_MAX_DRAWINGS or drawing_ratio > LOCAL_MAX_DRAWING_RATIO:
+        route, reason = "model", "vector graphics"
+    elif math_chars > max(LOCAL_MAX_MATH_CHARS, text_chars * 0.005):
+        route, reason = "model", "equations"
+    elif letters and min(latin_letters, other_letters) > letters * 0.05:
+        route, reason = "model", "mixed scripts"
+    else:
+        route, reason = "local", "prose"
+    return {"route": route, "reason": reason, "features": features}
+
+
+def page_to_markdown(page: fitz.Page, text_dict: Optional[Dict[str, Any]] = None) -> str:
+    """Convert a prose page's text layer to Markdown: headings by font size, paragraphs, bullets."""
+    if text_dict is None:
+        text_dict = page.get_text("dict", sort=True)
+    size_chars: Dict[float, int] = {}
+    for span in page_text_spans(text_dict):
+        size = round(float(span.get("size", 0)), 1)
+        size_chars[size] = size_chars.get(size, 0) + len(span.get("text", "").strip())
+    if not size_chars:
+        return ""
+    body_size = max(size_chars.items(), key=lambda item: item[1])[0] or 1.0
+    margin = page.rect.height * 0.08
+
+    parts: List[str] = []
+    for block in text_dict.get("blocks", []):
+        if block.get("type") != 0:
+            continue
+        lines: List[Tuple[str, float]] = []
+        for line in block.get("lines", []):
+            text = "".join(span.get("text", "") for span in line.get("spans", [])).strip()
+            if not text:
+                continue
+            size = max(float(span.get("size", 0)) for span in line.get("spans", []))
+            lines.append((text, size))
+        if not lines:
+            continue
+        block_text = " ".join(text for text, _size in lines)
+        _x0, y0, _x1, y1 = block["bbox"]
+        if block_text.isdigit() and (y1 < margin or y0 > page.rect.height - margin):
+            continue  # running page number
+
+        block_size = min(size for _text, size in lines)
+        if block_size >= body_size * 1.2 and len(block_text) < 200:
+            if block_size >= body_size * 1.6:
+                prefix = "#"
+            elif block_size >= body_size * 1.35:
+                prefix = "##"
+            else:
+                prefix = "###"
+            parts.append(f"{prefix} {block_text}")
+            continue
+
+        paragraphs: List[str] = []
+        current = ""
+        for text, _size in lines:
+            if text[0] in BULLET_CHARS:
+                if current:
+                    paragraphs.append(current)
+                current = "- " + text[1:].strip()
+                continue
+            if current.endswith("-") and text[:1].islower():
+                current = current[:-1] + text
+            else:
+                current = f"{current} {text}" if current else text
+        if current:
+            paragraphs.append(current)
+        parts.append("\n".join(paragraphs))
+    return "\n\n".join(parts).strip()
+
+
+def page_fingerprint(page: fitz.Page) -> Dict[str, Any]:
+    """Perceptual fingerprint of a page: a difference hash and its ink coverage.
+
+    The page is rendered as a small grayscale thumbnail, so this is cheap and
+    independent of the parse DPI. The hash compares each cell of a
+    DEDUP_HASH_SIZE grid with its right neighbour (a dHash), which survives
+    scan noise. A dHash cannot tell two pages of body text apart, so a
+    half-size copy of the thumbnail is kept for a pixel check on hash matches,
+    and so is the normalised text layer.
+    """
+    scale = DEDUP_THUMB_DPI / 72.0
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csGRAY, alpha=False)
+    thumb = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    histogram = thumb.histogram()
+    ink_ratio = sum(histogram[:DEDUP_INK_LEVEL]) / max(1, pix.width * pix.height)
+    cells = thumb.resize((DEDUP_HASH_SIZE + 1, DEDUP_HASH_SIZE), Image.LANCZOS).tobytes()
+    bits = 0
+    for row in range(DEDUP_HASH_SIZE):
+        offset = row * (DEDUP_HASH_SIZE + 1)
+        for col in range(DEDUP_HASH_SIZE):
+            bits = (bits << 1) | int(cells[offset + col] > cells[offset + col + 1])
+    check = thumb.reduce(2)
+    thumb.close()
+    return {
+        "hash": bits,
+        "ink_ratio": ink_ratio,
+        "thumb": check,
+        "text": " ".join(page.get_text("text").split()),
+    }
+
+
+def thumbs_match(left: Image.Image, right: Image.Image) -> bool:
+    if left.size != right.size:
+        return False
+    return ImageStat.Stat(ImageChops.difference(left, right)).mean[0] <= DEDUP_MAX_PIXEL_DIFF
+
+
+def hash_distance(left: int, right: int) -> int:
+    return bin(left ^ right).count("1")
+
+
+def plan_page_dedup(
+    fingerprints: Dict[int, Dict[str, Any]], max_distance: int
+) -> Tuple[List[int], Dict[int, int]]:
+    """Split pages into blank ones and near-duplicates of an earlier page.
+
+    Returns (blank_pages, duplicates) where duplicates maps a page to the
+    first page it repeats. Pages are compared against earlier kept pages only,
+    so every duplicate points at a page that is actually parsed.
+    """
+    blank: List[int] = []
+    duplicates: Dict[int, int] = {}
+    kept: List[Tuple[int, Dict[str, Any]]] = []
+    for page_no in sorted(fingerprints):
+        entry = fingerprints[page_no]
+        if entry["ink_ratio"] < BLANK_MAX_INK_RATIO:
+            blank.append(page_no)
+            continue
+        for source_no, source in kept:
+            if (
+                entry["text"] == source["text"]
+                and hash_distance(entry["hash"], source["hash"]) <= max_distance
+                and thumbs_match(entry["thumb"], source["thumb"])
+            ):
+                duplicates[page_no] = source_no
+                break
+        else:
+            kept.append((page_no, entry))
+    return blank, duplicates
+
+
+def pixmap_to_image(pix: fitz.Pixmap) -> Image.Image:
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def render_page_image(doc: fitz.Document, index: int, matrix: fitz.Matrix) -> Image.Image:
+    page = doc.load_page(index)
+    return pixmap_to_image(page.get_pixmap(matrix=matrix, alpha=False))
+
+
+def render_page_samples(
+    pdf_path: str, indices: List[int], dpi: int, page_range: Optional[Tuple[int, int]] = None
+) -> List[Tuple[int, int, bytes]]:
+    """Render pages in a worker process and return raw RGB samples for the parent."""
+    scale = dpi / 72.0
+    matrix = fitz.Matrix(scale, scale)
+    doc = open_section(pdf_path, page_range)
+    try:
+        samples: List[Tuple[int, int, bytes]] = []
+        for index in indices:
+            pix = doc.load_page(index).get_pixmap(matrix=matrix, alpha=False)
+            samples.append((pix.width, pix.height, bytes(pix.samples)))
+        return samples
+    finally:
+        doc.close()
+
+
+def page_pixel_size(page: fitz.Page, matrix: fitz.Matrix) -> Tuple[int, int]:
+    rect = (page.rect * matrix).irect
+    return rect.width, rect.height
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    tiles = math.ceil(width / IMAGE_TOKEN_TILE) * math.ceil(height / IMAGE_TOKEN_TILE)
+    return tiles * TOKENS_PER_IMAGE_TILE
+
+
+def tile_size(sizes: List[Tuple[int, int]], columns: int) -> Tuple[int, int]:
+    cell_width = max(width for width, _height in sizes)
+    height = 0
+    for row_start in range(0, len(sizes), columns):
+        row = sizes[row_start : row_start + columns]
+        height += max(row_height for _width, row_height in row) + TILE_BAND_HEIGHT
+    return cell_width * columns, height
+
+
+def grid_columns(sizes: List[Tuple[int, int]]) -> int:
+    """Pick the column count with the fewest estimated tokens, then the squarest tile."""
+    best_columns = 1
+    best_score: Optional[Tuple[int, float]] = None
+    for columns in range(1, len(sizes) + 1):
+        width, height = tile_size(sizes, columns)
+        score = (estimate_image_tokens(width, height), max(width, height) / max(1, min(width, height)))
+        if best_score is None or score < best_score:
+            best_columns = columns
+            best_score = score
+    return best_columns
+
+
+def describe_tile(pages: List[int], page_sizes: List[Tuple[int, int]], layout: str) -> Dict[str, Any]:
+    sizes = [page_sizes[page_no - 1] for page_no in pages]
+    columns = grid_columns(sizes) if layout == "grid" else 1
+    width, height = tile_size(sizes, columns)
+    return {
+        "pages": pages,
+        "layout": layout if columns > 1 else "vertical",
+        "columns": columns,
+        "width": width,
+        "height": height,
+        "estimated_tokens": estimate_image_tokens(width, height),
+    }
+
+
+def plan_tiles(
+    page_sizes: List[Tuple[int, int]],
+    max_pages: int,
+    layout: str = "vertical",
+    max_pixels: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    page_numbers: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    """Greedily pack pages, in order, into tiles under the page, pixel and token budgets.
+
+    `page_numbers` restricts packing to a subset of pages (default: all). A page
+    that alone exceeds a budget still gets a tile of its own.
+    """
+
+    def fits(tile: Dict[str, Any]) -> bool:
+        if max_pixels is not None and tile["width"] * tile["height"] > max_pixels:
+            return False
+        if max_tokens is not None and tile["estimated_tokens"] > max_tokens:
+            return False
+        return True
+
+    tiles: List[Dict[str, Any]] = []
+    current: List[int] = []
+    if page_numbers is None:
+        page_numbers = list(range(1, len(page_sizes) + 1))
+    for page_no in page_numbers:
+        candidate = current + [page_no]
+        if current and (len(candidate) > max_pages or not fits(describe_tile(candidate, page_sizes, layout))):
+            tiles.append(describe_tile(current, page_sizes, layout))
+            current = [page_no]
+        else:
+            current = candidate
+    if current:
+        tiles.append(describe_tile(current, page_sizes, layout))
+    return tiles
+
+
+def tile_layout_text(tile: Dict[str, Any]) -> str:
+    if tile["columns"] > 1:
+        return (
+            f"arranged in a grid with {tile['columns']} columns "
+            "(read the grid left to right, then top to bottom)"
+        )
+    return "stacked vertically"
+
+
+def tile_filename(tile: Dict[str, Any]) -> str:
+    pages = tile["pages"]
+    suffix = f"_g{tile['columns']}" if tile["columns"] > 1 else ""
+    if pages != list(range(pages[0], pages[-1] + 1)):
+        digest = hashlib.sha1(",".join(str(n) for n in pages).encode("ascii")).hexdigest()[:8]
+        suffix += f"_{digest}"
+    return f"tile_{pages[0]:03d}_{pages[-1]:03d}{suffix}.png"
+
+
+def paste_tile_row(
+    canvas: Image.Image,
+    top: int,
+    cell_width: int,
+    row_numbers: List[int],
+    row_images: Iterable[Image.Image],
+) -> None:
+    """Draw the page bands for one tile row at `top` and paste its pages under them.
+
+    `row_images` is consumed one page at a time, so a generator that decodes
+    from disk only ever holds one page besides the canvas.
+    """
+    draw = ImageDraw.Draw(canvas)
+    font = ImageFont.load_default()
+    for column, (page_no, img) in enumerate(zip(row_numbers, row_images)):
+        left = column * cell_width
+        draw.rectangle([left, top, left + cell_width, top + TILE_BAND_HEIGHT], fill=(245, 245, 245))
+        draw.text((left + 10, top + 12), f"=== PAGE {page_no:03d} ===", fill=(0, 0, 0), font=font)
+        canvas.paste(img, (left + (cell_width - img.width) // 2, top + TILE_BAND_HEIGHT))
+
+
+def compose_tile(images: List[Image.Image], page_numbers: List[int], columns: int = 1) -> Image.Image:
+    width, total_height = tile_size([img.size for img in images], columns)
+    cell_width = width // columns
+    tile = Image.new("RGB", (width, total_height), (255, 255, 255))
+
+    cursor = 0
+    for row_start in range(0, len(images), columns):
+        row_images = images[row_start : row_start + columns]
+        row_numbers = page_numbers[row_start : row_start + columns]
+        paste_tile_row(tile, cursor, cell_width, row_numbers, row_images)
+        cursor += max(img.height for img in row_images) + TILE_BAND_HEIGHT
+    return tile
+
+
+def image_sizes(paths: List[Path]) -> List[Tuple[int, int]]:
+    """Pixel sizes read from the image headers, without decoding the pixels."""
+    sizes = []
+    for path in paths:
+        with Image.open(path) as img:
+            sizes.append(img.size)
+    return sizes
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
 def build_tile_image(
     page_image_paths: List[Path],
     page_numbers: List[int],
     out_path: Path,
-) -> Path:
-    images: List[Image.Image] = []
-    for path in page_image_paths:
-        images.append(Image.open(path).convert("RGB"))
-
-    width = max(img.width for img in images)
-    band_height = 40
-    total_height = sum(img.height + band_height for img in images)
-    tile = Image.new("RGB", (width, total_height), (255, 255, 255))
-    draw = ImageDraw.Draw(tile)
-    font = ImageFont.load_default()
+    columns: int = 1,
+    compose: str = "canvas",
+) -> int:
+    """Write a tile PNG and return the estimated peak pixel-buffer bytes.
+
+    "canvas" pastes pages one at a time into a full-size tile and lets PIL
+    encode it: one page plus the tile in memory. "strips" renders one tile
+    row at a time and streams it through zlib into a hand-written PNG, so
+    only one row strip (plus one page) is ever held. Strip PNGs skip PIL's
+    per-row filters, so they come out somewhat larger.
+    """
+    sizes = image_sizes(page_image_paths)
+    width, total_height = tile_size(sizes, columns)
+    cell_width = width // columns
+    # A page is briefly held twice: decoded as stored, then converted to RGB.
+    page_bytes = 2 * max(page_width * page_height * 3 for page_width, page_height in sizes)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    cursor = 0
-    for img, page_no in zip(images, page_numbers):
-        draw.rectangle([0, cursor, width, cursor + band_height], fill=(245, 245, 245))
-        label = f"=== PAGE {page_no:03d} ==="
-        draw.text((10, cursor + 12), label, fill=(0, 0, 0), font=font)
-        cursor += band_height
-        offset_x = (width - img.width) // 2
-        tile.paste(img, (offset_x, cursor))
-        cursor += img.height
+    def iter_row_pages(row_start: int) -> Iterator[Image.Image]:
+        for path in page_image_paths[row_start : row_start + columns]:
+            with Image.open(path) as source:
+                img = source.convert("RGB")
+            try:
+                yield img
+            finally:
+                img.close()
+
+    def paste_row(canvas: Image.Image, top: int, row_start: int) -> None:
+        row_numbers = page_numbers[row_start : row_start + columns]
+        paste_tile_row(canvas, top, cell_width, row_numbers, iter_row_pages(row_start))
+
+    if compose == "canvas":
+        tile = Image.new("RGB", (width, total_height), (255, 255, 255))
+        cursor = 0
+        for row_start in range(0, len(sizes), columns):
+            paste_row(tile, cursor, row_start)
+            cursor += max(height for _width, height in sizes[row_start : row_start + columns]) + TILE_BAND_HEIGHT
+        tile.save(out_path)
+        tile.close()
+        return width * total_height * 3 + page_bytes
+
+    tmp_path = out_path.with_name(f".{out_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    compressor = zlib.compressobj(6)
+    peak = 0
+    with tmp_path.open("wb") as handle:
+        handle.write(b"\x89PNG\r\n\x1a\n")
+        handle.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, total_height, 8, 2, 0, 0, 0)))
+        stride = width * 3
+        for row_start in range(0, len(sizes), columns):
+            strip_height = max(height for _width, height in sizes[row_start : row_start + columns]) + TILE_BAND_HEIGHT
+            strip = Image.new("RGB", (width, strip_height), (255, 255, 255))
+            paste_row(strip, 0, row_start)
+            raw = strip.tobytes()
+            strip.close()
+            # Scanlines get filter type 0 (none) and are compressed in small
+            # batches, so the strip is never copied whole.
+            batch = stride * 256
+            peak = max(peak, len(raw) + batch + page_bytes)
+            for start in range(0, len(raw), batch):
+                chunk = raw[start : start + batch]
+                scanlines = b"".join(b"\x00" + chunk[i : i + stride] for i in range(0, len(chunk), stride))
+                data = compressor.compress(scanlines)
+                if data:
+                    handle.write(png_chunk(b"IDAT", data))
+            del raw
+        handle.write(png_chunk(b"IDAT", compressor.flush()))
+        handle.write(png_chunk(b"IEND", b""))
+    os.replace(tmp_path, out_path)
+    return peak
+
+
+def encode_image(image: Image.Image, upload_format: str = "png", quality: int = 85) -> Tuple[bytes, str]:
+    pil_format, mime_type = UPLOAD_FORMATS[upload_format]
+    buffer = io.BytesIO()
+    if upload_format == "png":
+        image.save(buffer, format=pil_format)
+    else:
+        image.save(buffer, format=pil_format, quality=quality)
+    return buffer.getvalue(), mime_type
+
+
+def load_image_payload(image_path: Path, upload_format: str = "png", quality: int = 85) -> Tuple[bytes, str]:
+    if upload_format == "png":
+        return image_path.read_bytes(), UPLOAD_FORMATS["png"][1]
+    with Image.open(image_path) as image:
+        return encode_image(image.convert("RGB"), upload_format, quality)
+
+
+def fit_inline(
+    image_data: bytes, upload_format: str, quality: int, limit: int = INLINE_SIZE_LIMIT
+) -> Tuple[bytes, Optional[float]]:
+    """Downscale an encoded image until it fits under `limit` bytes.
+
+    Returns the payload and the scale applied (None if it already fit). The
+    model reports bboxes normalised to the image, so crops are unaffected.
+    """
+    if len(image_data) <= limit:
+        return image_data, None
+    with Image.open(io.BytesIO(image_data)) as source:
+        image = source.convert("RGB")
+    data = image_data
+    scale = 1.0
+    for _attempt in range(6):
+        # Encoded size tracks pixel count; aim a little under the limit.
+        scale *= math.sqrt(limit / len(data)) * 0.95
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        resized = image.resize(size, Image.LANCZOS)
+        data, _mime_type = encode_image(resized, upload_format, quality)
+        resized.close()
+        if len(data) <= limit:
+            break
+    image.close()
+    return data, round(scale, 4)
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    tile.save(out_path)
-    for img in images:
-        img.close()
-    return out_path
 
+class GeminiBackend:
+    """Model backend that talks to the Gemini API through google-genai.
 
-def build_contents(client: "genai.Client", image_path: Path, prompt: str) -> List[Any]:
-    mime_type = "image/png"
-    if image_path.stat().st_size > INLINE_SIZE_LIMIT:
-        uploaded = client.files.upload(file=str(image_path), config={"mimeType": mime_type})
-        return [uploaded, prompt]
-    with image_path.open("rb") as handle:
-        data = handle.read()
-    return [types.Part.from_bytes(data=data, mime_type=mime_type), prompt]
+    A backend turns an encoded image plus prompt into request contents once
+    (`prepare`, which may upload), then sends them as often as retries need
+    (`generate`). `generate` returns an object with `.text` and
+    `.usage_metadata` and raises ModelClientError for client errors.
+    Payloads over `inline_limit` go through the Files API, reusing handles
+    from `uploads` while they are live.
+    """
 
+    name = "gemini"
+    inline_limit = INLINE_SIZE_LIMIT
 
-def call_gemini(
+    def __init__(self, client: "genai.Client", uploads: Optional[UploadRegistry] = None):
+        load_genai()
+        self.client = client
+        self.uploads = uploads
+
+    def prepare(self, image_data: bytes, mime_type: str, prompt: str, refresh: bool = False) -> List[Any]:
+        return build_contents(self.client, image_data, mime_type, prompt, uploads=self.uploads, refresh=refresh)
+
+    def generate(self, model: str, contents: List[Any]) -> Any:
+        config = types.GenerateContentConfig(response_mime_type="application/json", temperature=0)
+        try:
+            return self.client.models.generate_content(model=model, contents=contents, config=config)
+        except Exception as exc:
+            if genai_errors is not None and isinstance(exc, genai_errors.ClientError):
+                raise ModelClientError(exc.code, exc.details, str(exc)) from exc
+            raise
+
+
+def build_contents(
     client: "genai.Client",
+    image_data: bytes,
+    mime_type: str,
+    prompt: str,
+    uploads: Optional[UploadRegistry] = None,
+    refresh: bool = False,
+) -> List[Any]:
+    if len(image_data) > INLINE_SIZE_LIMIT:
+
+        def upload() -> Dict[str, Any]:
+            uploaded = client.files.upload(file=io.BytesIO(image_data), config={"mimeType": mime_type})
+            expiration = getattr(uploaded, "expiration_time", None)
+            return {
+                "name": uploaded.name,
+                "uri": uploaded.uri,
+                "mime_type": uploaded.mime_type or mime_type,
+                "expires_at": expiration.timestamp() if expiration else time.time() + UPLOAD_TTL_S,
+            }
+
+        handle = reuse_or_upload(uploads, image_data, mime_type, upload, refresh=refresh)
+        return [types.Part.from_uri(file_uri=handle["uri"], mime_type=handle["mime_type"]), prompt]
+    return [types.Part.from_bytes(data=image_data, mime_type=mime_type), prompt]
+
+
+def estimate_request_tokens(image_data: bytes, prompt: str) -> int:
+    with Image.open(io.BytesIO(image_data)) as image:
+        width, height = image.size
+    return estimate_image_tokens(width, height) + len(prompt) // 4
+
+
+def call_gemini(
+    backend: Any,
     model: str,
-    image_path: Path,
+    image_data: bytes,
     prompt: str,
     return_raw: bool = False,
+    limiter: Optional[RateLimiter] = None,
+    cache: Optional[ResponseCache] = None,
+    mime_type: str = "image/png",
+    stats: Optional[StageStats] = None,
+    call_info: Optional[Dict[str, Any]] = None,
+    hedge: Optional[HedgePolicy] = None,
+    malformed_retries: int = MALFORMED_RETRIES,
 ) -> Any:
-    config = types.GenerateContentConfig(response_mime_type="application/json", temperature=0)
-    contents = build_contents(client, image_path, prompt)
+    """Send one image+prompt to the backend and return the parsed JSON.
+
+    When `call_info` is given it is filled with what the call cost: attempts,
+    429 and malformed retries, token counts and whether the cache answered.
+    """
+    info = call_info if call_info is not None else {}
+    info.update({"cached": False, "attempts": 0, "rate_limited": 0, "malformed": 0})
+    cache_key: Optional[str] = None
+    if cache is not None:
+        cache_key = ResponseCache.make_key(image_data, prompt, model)
+        cached_text = cache.get(cache_key)
+        if cached_text is not None:
+            try:
+                parsed = parse_json_payload(cached_text)
+            except json.JSONDecodeError:
+                parsed = None
+            if parsed is not None:
+                info["cached"] = True
+                if stats is not None:
+                    stats.count("cache_hits")
+                if return_raw:
+                    return parsed, cached_text
+                return parsed
+    with stats.timed("upload") if stats is not None else nullcontext():
+        contents = backend.prepare(image_data, mime_type, prompt)
+    estimated_tokens = 0
+    if limiter is not None and limiter.tokens_per_minute:
+        estimated_tokens = estimate_request_tokens(image_data, prompt)
+    # Only payloads over the backend's inline limit reference an uploaded file.
+    uploaded = len(image_data) > getattr(backend, "inline_limit", INLINE_SIZE_LIMIT)
+    upload_refreshed = False
     attempts = 0
+    malformed_attempts = 0
     while True:
+        if limiter is not None:
+            limiter.acquire(estimated_tokens)
+        info["attempts"] += 1
+        if stats is not None:
+            stats.count("requests")
         try:
-            response = client.models.generate_content(model=model, contents=contents, config=config)
-            break
-        except Exception as exc:
-            if genai_errors is None or not isinstance(exc, genai_errors.ClientError):
-                raise
+            with stats.timed("model") if stats is not None else nullcontext():
+                if hedge is not None:
+                    response = generate_hedged(backend, model, contents, hedge, limiter, estimated_tokens, stats)
+                else:
+                    response = backend.generate(model, contents)
+        except ModelClientError as exc:
+            if exc.code in STALE_UPLOAD_CODES and uploaded and not upload_refreshed:
+                # A reused handle was deleted before its expiry or belongs to
+                # another key; forget it and upload once more.
+                upload_refreshed = True
+                print(f"Uploaded file rejected (HTTP {exc.code}); uploading again...", file=sys.stderr)
+                with stats.timed("upload") if stats is not None else nullcontext():
+                    contents = backend.prepare(image_data, mime_type, prompt, refresh=True)
+                continue
             if exc.code != 429:
                 raise
             details = exc.details
@@ -246,11 +1476,41 @@ def call_gemini(
             retry_delay = extract_retry_delay(details)
             sleep_for = max(1.0, retry_delay or (2 ** attempts))
             print(f"Rate limit hit; retrying in {sleep_for:.1f}s...", file=sys.stderr)
-            time.sleep(sleep_for)
+            info["rate_limited"] += 1
+            if stats is not None:
+                stats.record("retry", sleep_for)
+                stats.count("rate_limit_retries")
+            if limiter is not None:
+                limiter.pause(sleep_for)
+            else:
+                time.sleep(sleep_for)
             attempts += 1
-    if not response or not response.text:
-        raise RuntimeError("Gemini returned an empty response.")
-    parsed = parse_json_payload(response.text)
+            continue
+        # Malformed attempts are billed too, so tokens add up across retries.
+        for key, value in usage_tokens(response).items():
+            info[key] = info.get(key, 0) + value
+            if stats is not None:
+                stats.count(key, value)
+        try:
+            if not response or not response.text:
+                raise MalformedResponseError("Gemini returned an empty response.")
+            with stats.timed("parse") if stats is not None else nullcontext():
+                parsed = parse_json_payload(response.text)
+        except (MalformedResponseError, json.JSONDecodeError) as exc:
+            if malformed_attempts >= malformed_retries:
+                if isinstance(exc, json.JSONDecodeError):
+                    raise MalformedResponseError(f"Gemini returned malformed JSON: {exc}") from exc
+                raise
+            malformed_attempts += 1
+            info["malformed"] += 1
+            if stats is not None:
+                stats.record("malformed", 0.0)
+                stats.count("malformed_retries")
+            print("Gemini returned an empty or malformed response; retrying...", file=sys.stderr)
+            continue
+        break
+    if cache is not None and cache_key is not None:
+        cache.put(cache_key, response.text, model, prompt)
     if return_raw:
         return parsed, response.text
     return parsed
@@ -318,28 +1578,83 @@ def extract_tile_pages(response: Any, chunk_numbers: List[int]) -> List[Dict[str
     return normalized
 
 
+def bbox_to_page_rect(bbox: List[float], page_rect: fitz.Rect) -> fitz.Rect:
+    ymin, xmin, ymax, xmax = (max(0.0, min(1000.0, float(v))) / 1000.0 for v in bbox)
+    clip = fitz.Rect(
+        page_rect.x0 + xmin * page_rect.width,
+        page_rect.y0 + ymin * page_rect.height,
+        page_rect.x0 + xmax * page_rect.width,
+        page_rect.y0 + ymax * page_rect.height,
+    )
+    if clip.x1 <= clip.x0:
+        clip.x1 = min(page_rect.x1, clip.x0 + 1)
+    if clip.y1 <= clip.y0:
+        clip.y1 = min(page_rect.y1, clip.y0 + 1)
+    return clip
+
+
+def render_pdf_crops(page: fitz.Page, bboxes: List[List[float]], dpi: int) -> List[Image.Image]:
+    """Render each normalised bbox of `page` at `dpi`, parsing the page content once."""
+    scale = dpi / 72.0
+    matrix = fitz.Matrix(scale, scale)
+    display_list = page.get_displaylist()
+    crops: List[Image.Image] = []
+    for bbox in bboxes:
+        clip = bbox_to_page_rect(bbox, page.rect)
+        crops.append(pixmap_to_image(display_list.get_pixmap(matrix=matrix, clip=clip, alpha=False)))
+    return crops
+
+
 def insert_image_blocks(
     markdown: str,
     images: List[Dict[str, Any]],
     page_image_path: Path,
     crops_dir: Path,
     markdown_path: Path,
+    page_image: Optional[Image.Image] = None,
+    pdf_page: Optional[fitz.Page] = None,
+    crop_dpi: int = 300,
+    archive: Optional[SectionArchive] = None,
 ) -> Tuple[str, List[Dict[str, Any]]]:
-    crops_dir.mkdir(parents=True, exist_ok=True)
-    page_image = Image.open(page_image_path).convert("RGB")
-    width, height = page_image.size
-    results: List[Dict[str, Any]] = []
+    """Crop each figure and replace its placeholder with an <IMAGE> block.
 
+    Crops come from `pdf_page` at `crop_dpi` when given (sharper, and no page
+    image is needed), otherwise from the rendered page image. With `archive`
+    the crops are stored there under their would-be paths.
+    """
+    results: List[Dict[str, Any]] = []
+    figures: List[Tuple[int, str, List[Any]]] = []
     for idx, item in enumerate(images, start=1):
         label = str(item.get("label") or f"img_{idx:02d}")
         bbox_norm = item.get("bbox_norm") or item.get("bbox") or []
         if len(bbox_norm) != 4:
             continue
-        x0, y0, x1, y1 = normalize_bbox([float(v) for v in bbox_norm], width, height)
-        crop = page_image.crop((x0, y0, x1, y1))
+        figures.append((idx, label, bbox_norm))
+    if not figures:
+        return markdown.strip() + "\n", results
+    if archive is None:
+        crops_dir.mkdir(parents=True, exist_ok=True)
+
+    if pdf_page is not None:
+        with FITZ_LOCK:
+            crops = render_pdf_crops(pdf_page, [[float(v) for v in bbox] for _idx, _label, bbox in figures], crop_dpi)
+    else:
+        owns_image = page_image is None
+        if page_image is None:
+            page_image = Image.open(page_image_path).convert("RGB")
+        width, height = page_image.size
+        crops = [
+            page_image.crop(normalize_bbox([float(v) for v in bbox], width, height))
+            for _idx, _label, bbox in figures
+        ]
+        if owns_image:
+            page_image.close()
+
+    for (idx, label, bbox_norm), crop in zip(figures, crops):
         crop_name = f"{page_image_path.stem}_img_{idx:02d}.png"
         crop_path = crops_dir / crop_name
-        crop.save(crop_path)
+        save_output_image(crop_path, crop, archive)
+        crop.close()
 
         source_rel = os.path.relpath(page_image_path, markdown_path.parent)
         crop_rel = os.path.relpath(crop_path, markdown_path.parent)
@@ -364,10 +1679,14 @@ def insert_image_blocks(
             }
         )
 
-    page_image.close()
     return markdown.strip() + "\n", results
 
 
+def close_images(images: Dict[int, Image.Image]) -> None:
+    for image in images.values():
+        image.close()
+
+
 def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
@@ -381,24 +1700,51 @@ def load_config(config_path: Path) -> Dict[str, Any]:
         return {}
 
 
+def write_text_atomic(path: Path, text: str) -> None:
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
 def save_config(config_path: Path, config: Dict[str, Any]) -> None:
-    config_path.write_text(json.dumps(config, indent=2, ensure_ascii=True) + "\n", encoding="utf-8")
+    write_text_atomic(config_path, json.dumps(config, indent=2, ensure_ascii=True) + "\n")
 
 
-IMAGE_BLOCK_RE = re.compile(
-    r'<IMAGE\s+source="([^"]+)"\s+bbox="([^"]+)"\s*>\s*'
-    r'!\[([^\]]*)\]\(([^)]+)\)\s*</IMAGE>',
-    re.IGNORECASE,
-)
+def save_run_manifest(config_path: Path, run_info: Dict[str, Any]) -> None:
+    """Insert or refresh this run's parse_runs entry, keeping the rest of config.json."""
+    config = load_config(config_path)
+    parse_runs = [run for run in config.get("parse_runs", []) if run.get("run_at") != run_info["run_at"]]
+    parse_runs.append(run_info)
+    config["parse_runs"] = parse_runs
+    save_config(config_path, config)
 
 
-def load_existing_markdown(page_md_path: Path) -> Optional[str]:
+def load_existing_markdown(page_md_path: Path, archive: Optional[SectionArchive] = None) -> Optional[str]:
+    if archive is not None:
+        content = (archive.read_text(page_md_path) or "").strip()
+        return content or None
     if not page_md_path.exists():
         return None
     content = page_md_path.read_text(encoding="utf-8").strip()
     return content or None
 
 
+def save_output_text(path: Path, text: str, archive: Optional[SectionArchive] = None) -> None:
+    if archive is not None:
+        archive.write_text(path, text)
+    else:
+        write_text_atomic(path, text)
+
+
+def save_output_image(path: Path, image: Image.Image, archive: Optional[SectionArchive] = None) -> None:
+    if archive is None:
+        image.save(path)
+        return
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    archive.write_bytes(path, buffer.getvalue())
+
+
 def extract_image_records_from_markdown(markdown: str, markdown_path: Path) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
     for match in IMAGE_BLOCK_RE.finditer(markdown):
@@ -428,8 +1774,99 @@ def extract_image_records_from_markdown(markdown: str, markdown_path: Path) -> L
         )
     return results
 
+
+def plan_section(
+    pdf_path: Path,
+    out_dir: Path,
+    dpi: int,
+    tile_pages: int,
+    prompt_path: Path,
+    force: bool,
+    state: Optional[PageStateStore] = None,
+    tile_layout: str = "vertical",
+    tile_max_pixels: Optional[int] = None,
+    tile_max_tokens: Optional[int] = None,
+    text_fast_path: bool = False,
+    page_range: Optional[Tuple[int, int]] = None,
+    section_name: Optional[str] = None,
+    pack: bool = False,
+) -> Dict[str, Any]:
+    """Work left in one section, the way process_pdf would split it, without rendering or calling the model.
+
+    Done pages come from the state store (or the page files); pending pages are
+    grouped into the same jobs process_pdf would send. Input tokens use the
+    same image/prompt estimate as the --tpm limiter.
+    """
+    section_name = section_name or pdf_path.stem
+    pages_dir = out_dir / "markdown" / "pages"
+    doc = open_section(pdf_path, page_range)
+    page_count = doc.page_count
+    done_pages = set()
+    if not force and state is not None and state.has_section(section_name):
+        done_pages = {page_no for page_no in state.completed_pages(section_name) if page_no <= page_count}
+    elif not force:
+        packed = archive_path(out_dir, section_name)
+        archive = SectionArchive(packed, out_dir, read_only=True) if pack and packed.exists() else None
+        for page_no in range(1, page_count + 1):
+            if load_existing_markdown(pages_dir / f"{section_name}_page_{page_no:03d}.md", archive):
+                done_pages.add(page_no)
+        if archive is not None:
+            archive.close()
+
+    model_pages = list(range(1, page_count + 1))
+    local_pages: List[int] = []
+    if text_fast_path:
+        model_pages = []
+        for page_no in range(1, page_count + 1):
+            if classify_page(doc.load_page(page_no - 1))["route"] == "local":
+                local_pages.append(page_no)
+            else:
+                model_pages.append(page_no)
+
+    render_matrix = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+    page_sizes = [page_pixel_size(doc.load_page(index), render_matrix) for index in range(page_count)]
+    doc.close()
+    jobs: List[Dict[str, Any]] = []
+    if tile_pages > 1:
+        for tile in plan_tiles(
+            page_sizes,
+            tile_pages,
+            layout=tile_layout,
+            max_pixels=tile_max_pixels,
+            max_tokens=tile_max_tokens,
+            page_numbers=model_pages,
+        ):
+            if force or any(page_no not in done_pages for page_no in tile["pages"]):
+                prompt = load_prompt(
+                    prompt_path,
+                    page_numbers=",".join(f"{n:03d}" for n in tile["pages"]),
+                    bbox_order=BBOX_ORDER,
+                    tile_layout=tile_layout_text(tile),
+                )
+                jobs.append({"pages": tile["pages"], "tokens": tile["estimated_tokens"] + len(prompt) // 4})
+    else:
+        for page_no in model_pages:
+            if force or page_no not in done_pages:
+                prompt = load_prompt(prompt_path, page_number=f"{page_no:03d}", bbox_order=BBOX_ORDER)
+                width, height = page_sizes[page_no - 1]
+                jobs.append({"pages": [page_no], "tokens": estimate_image_tokens(width, height) + len(prompt) // 4})
+
+    pending = {page_no for page_no in range(1, page_count + 1) if force or page_no not in done_pages}
+    return {
+        "section": section_name,
+        "pages": page_count,
+        "done": page_count - len(pending),
+        "pending": len(pending),
+        "local": sum(1 for page_no in local_pages if page_no in pending),
+        "model_pages": sum(len(job["pages"]) for job in jobs),
+        "calls": len(jobs),
+        "tiles": len(jobs) if tile_pages > 1 else 0,
+        "input_tokens": sum(job["tokens"] for job in jobs),
+    }
+
+
 def process_pdf(
-    client: "genai.Client",
+    backend: Any,
     pdf_path: Path,
     out_dir: Path,
     dpi: int,
@@ -437,124 +1874,893 @@ def process_pdf(
     model: str,
     prompt_path: Path,
     force: bool,
+    concurrency: int = 1,
+    limiter: Optional[RateLimiter] = None,
+    render_workers: int = 1,
+    cache: Optional[ResponseCache] = None,
+    pipeline: bool = False,
+    queue_size: int = 8,
+    in_memory: bool = False,
+    save_page_images: bool = False,
+    upload_format: str = "png",
+    upload_quality: int = 85,
+    tile_layout: str = "vertical",
+    tile_max_pixels: Optional[int] = None,
+    tile_max_tokens: Optional[int] = None,
+    text_fast_path: bool = False,
+    crop_source: str = "pdf",
+    crop_dpi: int = 300,
+    state: Optional[PageStateStore] = None,
+    request_gate: Optional[threading.Semaphore] = None,
+    dedup: bool = False,
+    dedup_distance: int = DEFAULT_DEDUP_DISTANCE,
+    fit_inline_payloads: bool = False,
+    tile_compose: str = "canvas",
+    hedge: Optional[HedgePolicy] = None,
+    malformed_retries: int = MALFORMED_RETRIES,
+    page_range: Optional[Tuple[int, int]] = None,
+    section_name: Optional[str] = None,
+    pack: bool = False,
 ) -> Dict[str, Any]:
-    section_name = pdf_path.stem
+    """Parse one section: a whole PDF, or `page_range` of it under `section_name`."""
+    section_name = section_name or pdf_path.stem
     images_dir = out_dir / "images" / section_name
     crops_dir = out_dir / "crops" / section_name
     markdown_dir = out_dir / "markdown"
     pages_dir = markdown_dir / "pages"
     tiles_dir = out_dir / "tiles" / section_name
+    # Packed output goes into one archive per section under the same names;
+    # page images and tiles then stay in memory.
+    archive = SectionArchive(archive_path(out_dir, section_name), out_dir) if pack else None
+    in_memory = in_memory or pack
     ensure_dir(markdown_dir)
-    ensure_dir(pages_dir)
-
-    doc = fitz.open(pdf_path)
-    page_count = doc.page_count
-    page_image_paths = render_pages(doc, images_dir, dpi, force)
-
+    if archive is None:
+        ensure_dir(pages_dir)
+
+    with FITZ_LOCK:
+        doc = open_section(pdf_path, page_range)
+        page_count = doc.page_count
+    stats = StageStats()
+    pipeline = pipeline or in_memory
+    # Pages are rendered once the jobs are known (per job inside the
+    # pipeline), so only pages that still go to the model are rasterised.
+    if archive is None:
+        ensure_dir(images_dir)
+    page_image_paths = [images_dir / f"page_{index + 1:03d}.png" for index in range(page_count)]
+
+    # per_page_markdown only holds pages written (or scanned) by this run;
+    # pages resumed from the state store are read back when combining.
     per_page_markdown: Dict[int, str] = {}
     image_records: Dict[int, List[Dict[str, Any]]] = {}
-    if not force:
+    done_pages = set()
+    if not force and state is not None and state.has_section(section_name):
+        for page_no, entry in state.completed_pages(section_name).items():
+            if page_no <= page_count:
+                done_pages.add(page_no)
+                image_records[page_no] = entry["image_records"]
+    elif not force:
+        # Outputs from before the state store existed: scan the page files
+        # once and backfill the store so the next resume is a single query.
         for page_no in range(1, page_count + 1):
             page_md_path = pages_dir / f"{section_name}_page_{page_no:03d}.md"
-            existing_markdown = load_existing_markdown(page_md_path)
+            existing_markdown = load_existing_markdown(page_md_path, archive)
             if not existing_markdown:
                 continue
             per_page_markdown[page_no] = existing_markdown.strip()
             image_records[page_no] = extract_image_records_from_markdown(existing_markdown, page_md_path)
-
-    if tile_pages > 1:
-        for start in progress_iter(range(0, page_count, tile_pages), desc="Parsing tiles", unit="tile"):
-            end = min(page_count, start + tile_pages)
-            chunk_paths = page_image_paths[start:end]
-            chunk_numbers = list(range(start + 1, end + 1))
-            missing_pages = [page_no for page_no in chunk_numbers if page_no not in per_page_markdown]
-            if not missing_pages and not force:
+            done_pages.add(page_no)
+            if state is not None:
+                state.mark_done(section_name, page_no, page_md_path, image_records[page_no], route="existing")
+
+    page_routes: Dict[int, Dict[str, Any]] = {}
+    page_metrics: Dict[int, Dict[str, Any]] = {}
+    tile_recovery: List[Dict[str, Any]] = []
+    model_pages = list(range(1, page_count + 1))
+    if text_fast_path:
+        # Every page is classified (it is cheap) so the tile plan for the
+        # model pages is the same on a resumed run as on the first one.
+        model_pages = []
+        for page_no in range(1, page_count + 1):
+            with stats.timed("classify"), FITZ_LOCK:
+                page = doc.load_page(page_no - 1)
+                text_dict = page.get_text("dict", sort=True)
+                decision = classify_page(page, text_dict)
+            page_routes[page_no] = decision
+            if decision["route"] != "local":
+                model_pages.append(page_no)
                 continue
-            tile_name = f"tile_{chunk_numbers[0]:03d}_{chunk_numbers[-1]:03d}.png"
-            tile_path = tiles_dir / tile_name
-            if force or not tile_path.exists():
-                build_tile_image(chunk_paths, chunk_numbers, tile_path)
-            prompt = load_prompt(
-                prompt_path,
-                page_numbers=",".join(f"{n:03d}" for n in chunk_numbers),
-                bbox_order=BBOX_ORDER,
-            )
-            response, raw_text = call_gemini(client, model, tile_path, prompt, return_raw=True)
-            pages = extract_tile_pages(response, chunk_numbers)
-            if not pages:
-                snippet = raw_text.strip().replace("\n", " ")
-                if len(snippet) > 400:
-                    snippet = snippet[:400] + "..."
-                raise RuntimeError(f"Tile response missing 'pages' list. Raw snippet: {snippet}")
-            for page_item in pages:
-                page_no_raw = page_item.get("page")
-                if page_no_raw is None:
-                    print("Skipping tile entry without page number.", file=sys.stderr)
-                    continue
-                page_no = int(page_no_raw)
-                if page_no < 1 or page_no > page_count:
-                    print(f"Skipping out-of-range page number: {page_no}", file=sys.stderr)
-                    continue
-                if not force and page_no in per_page_markdown:
-                    continue
-                markdown, images = coerce_page_response(page_item)
+            if not force and page_no in done_pages:
+                continue
+            with stats.timed("local"):
+                with FITZ_LOCK:
+                    markdown = page_to_markdown(page, text_dict).strip() + "\n"
                 page_md_path = pages_dir / f"{section_name}_page_{page_no:03d}.md"
-                markdown, crops = insert_image_blocks(
-                    markdown, images, page_image_paths[page_no - 1], crops_dir, page_md_path
-                )
-                page_md_path.write_text(markdown, encoding="utf-8")
+                save_output_text(page_md_path, markdown, archive)
                 per_page_markdown[page_no] = markdown
-                image_records[page_no] = crops
+                image_records[page_no] = []
+                done_pages.add(page_no)
+                if state is not None:
+                    state.mark_done(section_name, page_no, page_md_path, [], route="local")
+        local_count = sum(1 for decision in page_routes.values() if decision["route"] == "local")
+        print(f"Text fast path: {local_count} of {page_count} page(s) handled from the text layer.")
+
+    page_dedup: Dict[str, Any] = {}
+    duplicates: Dict[int, int] = {}
+    if dedup:
+        # Like the fast path, every model page is hashed on each run so a
+        # resumed run maps duplicates to the same source pages.
+        fingerprints: Dict[int, Dict[str, Any]] = {}
+        for page_no in model_pages:
+            with stats.timed("hash"), FITZ_LOCK:
+                fingerprints[page_no] = page_fingerprint(doc.load_page(page_no - 1))
+        blank_pages, duplicates = plan_page_dedup(fingerprints, dedup_distance)
+        for entry in fingerprints.values():
+            entry["thumb"].close()
+        model_pages = [page_no for page_no in model_pages if page_no not in duplicates and page_no not in blank_pages]
+        for page_no in blank_pages:
+            if not force and page_no in done_pages:
+                continue
+            page_md_path = pages_dir / f"{section_name}_page_{page_no:03d}.md"
+            save_output_text(page_md_path, "", archive)
+            per_page_markdown[page_no] = ""
+            image_records[page_no] = []
+            done_pages.add(page_no)
+            if state is not None:
+                state.mark_done(section_name, page_no, page_md_path, [], route="blank")
+        page_dedup = {"max_distance": dedup_distance, "blank": blank_pages, "duplicates": duplicates}
+        print(f"Dedup: skipping {len(blank_pages)} blank and {len(duplicates)} repeated page(s).")
+
+    render_matrix = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+    jobs: List[List[int]] = []
+    tile_plan: List[Dict[str, Any]] = []
+    tiles_by_start: Dict[int, Dict[str, Any]] = {}
+    if tile_pages > 1:
+        with FITZ_LOCK:
+            page_sizes = [page_pixel_size(doc.load_page(index), render_matrix) for index in range(page_count)]
+        tile_plan = plan_tiles(
+            page_sizes,
+            tile_pages,
+            layout=tile_layout,
+            max_pixels=tile_max_pixels,
+            max_tokens=tile_max_tokens,
+            page_numbers=model_pages,
+        )
+        for tile in tile_plan:
+            chunk_numbers = tile["pages"]
+            tiles_by_start[chunk_numbers[0]] = tile
+            missing_pages = [page_no for page_no in chunk_numbers if page_no not in done_pages]
+            if not missing_pages and not force:
+                continue
+            jobs.append(chunk_numbers)
     else:
-        for page_index in progress_iter(range(page_count), desc="Parsing pages", unit="page"):
-            page_no = page_index + 1
-            image_path = page_image_paths[page_index]
-            if not force and page_no in per_page_markdown:
+        for page_no in model_pages:
+            if not force and page_no in done_pages:
                 continue
+            jobs.append([page_no])
+
+    if not pipeline:
+        render_pages(
+            doc,
+            images_dir,
+            dpi,
+            force,
+            workers=render_workers,
+            stats=stats,
+            page_range=page_range,
+            indices=sorted({page_no - 1 for chunk_numbers in jobs for page_no in chunk_numbers}),
+        )
+
+    render_pool = (
+        ProcessPoolExecutor(max_workers=render_workers, mp_context=PROCESS_CONTEXT)
+        if pipeline and render_workers > 1
+        else None
+    )
+    prepare_workers = render_workers if render_pool is not None else 1
+
+    def render_in_memory(chunk_numbers: List[int]) -> Dict[int, Image.Image]:
+        indices = [page_no - 1 for page_no in chunk_numbers]
+        with stats.timed("render", len(indices)):
+            if render_pool is not None:
+                samples = render_pool.submit(render_page_samples, str(pdf_path), indices, dpi, page_range).result()
+                rendered = {
+                    index + 1: Image.frombytes("RGB", (width, height), data)
+                    for index, (width, height, data) in zip(indices, samples)
+                }
+            else:
+                with FITZ_LOCK:
+                    rendered = {index + 1: render_page_image(doc, index, render_matrix) for index in indices}
+        if save_page_images:
+            for page_no, image in rendered.items():
+                image_path = page_image_paths[page_no - 1]
+                missing = not archive.exists(image_path) if archive is not None else page_image_missing(image_path)
+                if force or missing:
+                    save_output_image(image_path, image, archive)
+        return rendered
+
+    def prepare_job(chunk_numbers: List[int]) -> Dict[str, Any]:
+        if state is not None:
+            # Claim right before rendering so other processes sharing this
+            # output directory skip the job instead of parsing it twice.
+            pending = [page_no for page_no in chunk_numbers if force or page_no not in done_pages]
+            if not state.claim(section_name, pending, include_done=force):
+                return {"skipped": True, "pages": {}}
+        if in_memory:
+            page_images = render_in_memory(chunk_numbers)
+            if tile_pages <= 1:
+                return {"image": page_images[chunk_numbers[0]], "pages": page_images}
+            with stats.timed("tile"):
+                columns = tiles_by_start[chunk_numbers[0]]["columns"]
+                tile = compose_tile([page_images[n] for n in chunk_numbers], chunk_numbers, columns)
+            pages_bytes = sum(image.width * image.height * 3 for image in page_images.values())
+            stats.peak("tile_buffer_bytes", tile.width * tile.height * 3 + pages_bytes)
+            return {"image": tile, "pages": page_images}
+        if pipeline:
+            indices = [
+                page_no - 1
+                for page_no in chunk_numbers
+                if force or page_image_missing(page_image_paths[page_no - 1])
+            ]
+            if indices:
+                with stats.timed("render", len(indices)):
+                    if render_pool is not None:
+                        render_pool.submit(
+                            render_page_range, str(pdf_path), indices, images_dir, dpi, page_range
+                        ).result()
+                    else:
+                        with FITZ_LOCK:
+                            for index in indices:
+                                save_page_png(doc, index, page_image_paths[index], render_matrix)
+        if tile_pages <= 1:
+            return {"image_path": page_image_paths[chunk_numbers[0] - 1], "pages": {}}
+        tile = tiles_by_start[chunk_numbers[0]]
+        tile_path = tiles_dir / tile_filename(tile)
+        if force or not tile_path.exists():
+            with stats.timed("tile"):
+                chunk_paths = [page_image_paths[page_no - 1] for page_no in chunk_numbers]
+                buffer_bytes = build_tile_image(
+                    chunk_paths, chunk_numbers, tile_path, columns=tile["columns"], compose=tile_compose
+                )
+            stats.peak("tile_buffer_bytes", buffer_bytes)
+        return {"image_path": tile_path, "pages": {}}
+
+    def tile_prompt(tile: Dict[str, Any]) -> str:
+        return load_prompt(
+            prompt_path,
+            page_numbers=",".join(f"{n:03d}" for n in tile["pages"]),
+            bbox_order=BBOX_ORDER,
+            tile_layout=tile_layout_text(tile),
+        )
+
+    def encode_payload(
+        image: Optional[Image.Image] = None, image_path: Optional[Path] = None
+    ) -> Tuple[bytes, str, Optional[float]]:
+        with stats.timed("encode"):
+            if image is not None:
+                image_data, mime_type = encode_image(image, upload_format, upload_quality)
+            else:
+                image_data, mime_type = load_image_payload(image_path, upload_format, upload_quality)
+        downscale = None
+        if fit_inline_payloads:
+            inline_limit = getattr(backend, "inline_limit", INLINE_SIZE_LIMIT)
+            if len(image_data) > inline_limit:
+                with stats.timed("downscale"):
+                    image_data, downscale = fit_inline(image_data, upload_format, upload_quality, inline_limit)
+                stats.count("downscaled")
+        return image_data, mime_type, downscale
+
+    def send(image_data: bytes, mime_type: str, prompt: str, call_info: Dict[str, Any]) -> Tuple[Any, str]:
+        if request_gate is not None:
+            # Waiting for other sections' calls is its own stage, not request time.
+            with stats.timed("gate"):
+                request_gate.acquire()
+        try:
+            with stats.timed("request"):
+                return call_gemini(
+                    backend,
+                    model,
+                    image_data,
+                    prompt,
+                    return_raw=True,
+                    limiter=limiter,
+                    cache=cache,
+                    mime_type=mime_type,
+                    stats=stats,
+                    call_info=call_info,
+                    hedge=hedge,
+                    malformed_retries=malformed_retries,
+                )
+        finally:
+            if request_gate is not None:
+                request_gate.release()
+
+    def recover_tile(
+        chunk_numbers: List[int], prepared: Dict[str, Any], pages: List[Dict[str, Any]], metrics: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Re-request the pages a tile response left out, keeping the ones it returned.
+
+        Missing pages are first sent together as a smaller tile (when that is
+        actually smaller), then any still missing go one page at a time.
+        """
+        returned = {item["page"] for item in pages if item["page"] in chunk_numbers}
+        missing = [page_no for page_no in chunk_numbers if page_no not in returned]
+        recovery: Dict[str, Any] = {"tile": chunk_numbers, "missing": missing, "requests": 0, "recovered": []}
+        stats.count("tile_pages_missing", len(missing))
+        groups = [missing] if 1 < len(missing) < len(chunk_numbers) else [[page_no] for page_no in missing]
+        while groups:
+            numbers = groups.pop(0)
+            tile = describe_tile(numbers, page_sizes, tile_layout)
+            with stats.timed("recover"):
+                if prepared["pages"]:
+                    with stats.timed("tile"):
+                        image = compose_tile([prepared["pages"][n] for n in numbers], numbers, tile["columns"])
+                    image_data, mime_type, _downscale = encode_payload(image=image)
+                    image.close()
+                else:
+                    tile_path = tiles_dir / tile_filename(tile)
+                    if force or not tile_path.exists():
+                        with stats.timed("tile"):
+                            paths = [page_image_paths[n - 1] for n in numbers]
+                            build_tile_image(paths, numbers, tile_path, columns=tile["columns"], compose=tile_compose)
+                    image_data, mime_type, _downscale = encode_payload(image_path=tile_path)
+                call_info: Dict[str, Any] = {}
+                recovery["requests"] += 1
+                try:
+                    response, _raw_text = send(image_data, mime_type, tile_prompt(tile), call_info)
+                    found = [item for item in extract_tile_pages(response, numbers) if item["page"] in numbers]
+                except GeminiRateLimitError:
+                    raise
+                except RuntimeError as exc:
+                    print(f"Recovery request for pages {numbers} failed: {exc}", file=sys.stderr)
+                    found = []
+            for key in ("input_tokens", "output_tokens"):
+                metrics[key] = metrics.get(key, 0) + call_info.get(key, 0)
+            pages.extend(found)
+            recovery["recovered"].extend(item["page"] for item in found)
+            still_missing = [page_no for page_no in numbers if page_no not in {item["page"] for item in found}]
+            if len(numbers) > 1:
+                groups.extend([page_no] for page_no in still_missing)
+        recovery["lost"] = [page_no for page_no in missing if page_no not in recovery["recovered"]]
+        stats.count("tile_pages_recovered", len(recovery["recovered"]))
+        if recovery["lost"]:
+            stats.count("tile_pages_lost", len(recovery["lost"]))
+        return pages, recovery
+
+    def request_job(
+        chunk_numbers: List[int], prepared: Dict[str, Any]
+    ) -> Tuple[Any, str, Dict[int, Image.Image], Dict[str, Any]]:
+        if prepared.get("skipped"):
+            return None, "", {}, {"skipped": True}
+        if tile_pages > 1:
+            prompt = tile_prompt(tiles_by_start[chunk_numbers[0]])
+        else:
             prompt = load_prompt(
                 prompt_path,
-                page_number=f"{page_no:03d}",
+                page_number=f"{chunk_numbers[0]:03d}",
                 bbox_order=BBOX_ORDER,
             )
-            response = call_gemini(client, model, image_path, prompt)
-            markdown, images = coerce_page_response(response)
-            page_md_path = pages_dir / f"{section_name}_page_{page_no:03d}.md"
-            markdown, crops = insert_image_blocks(markdown, images, image_path, crops_dir, page_md_path)
-            page_md_path.write_text(markdown, encoding="utf-8")
-            per_page_markdown[page_no] = markdown
-            image_records[page_no] = crops
+        if "image" in prepared:
+            image_data, mime_type, downscale = encode_payload(image=prepared["image"])
+            if tile_pages > 1:
+                prepared["image"].close()
+        else:
+            image_data, mime_type, downscale = encode_payload(image_path=prepared["image_path"])
+        meta: Dict[str, Any] = {"input_hash": ResponseCache.make_key(image_data, prompt, model)}
+        call_info: Dict[str, Any] = {}
+        started = time.perf_counter()
+        try:
+            try:
+                response, raw_text = send(image_data, mime_type, prompt, call_info)
+            except MalformedResponseError as exc:
+                if tile_pages <= 1:
+                    raise
+                # A tile reply with no usable pages is recovered like one
+                # missing pages: its pages are re-sent in smaller requests.
+                print(f"Tile {chunk_numbers}: {exc} Recovering its pages...", file=sys.stderr)
+                response, raw_text = {"pages": []}, str(exc)
+            metrics = dict(
+                call_info,
+                job_pages=len(chunk_numbers),
+                payload_bytes=len(image_data),
+                downscale=downscale,
+            )
+            if tile_pages > 1:
+                pages = extract_tile_pages(response, chunk_numbers)
+                if {item["page"] for item in pages} & set(chunk_numbers) != set(chunk_numbers):
+                    pages, meta["recovery"] = recover_tile(chunk_numbers, prepared, pages, metrics)
+                    response = {"pages": pages}
+        except Exception as exc:
+            if state is not None:
+                state.mark_failed(section_name, chunk_numbers, str(exc))
+            raise
+        metrics["request_s"] = round(time.perf_counter() - started, 3)
+        meta["metrics"] = metrics
+        if crop_source == "pdf":
+            # Crops are rendered from the PDF, so page buffers can go now
+            # instead of waiting in the queue for the writer.
+            close_images(prepared["pages"])
+            return response, raw_text, {}, meta
+        return response, raw_text, prepared["pages"], meta
+
+    def write_page(
+        page_no: int,
+        page_response: Any,
+        page_image: Optional[Image.Image] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        markdown, images = coerce_page_response(page_response)
+        page_md_path = pages_dir / f"{section_name}_page_{page_no:03d}.md"
+        pdf_page = None
+        if crop_source == "pdf" and images:
+            with FITZ_LOCK:
+                pdf_page = doc.load_page(page_no - 1)
+        with stats.timed("crop", len(images)) if images else nullcontext():
+            markdown, crops = insert_image_blocks(
+                markdown,
+                images,
+                page_image_paths[page_no - 1],
+                crops_dir,
+                page_md_path,
+                page_image=page_image,
+                pdf_page=pdf_page,
+                crop_dpi=crop_dpi,
+                archive=archive,
+            )
+        save_output_text(page_md_path, markdown, archive)
+        per_page_markdown[page_no] = markdown
+        image_records[page_no] = crops
+        done_pages.add(page_no)
+        meta = meta or {}
+        # Tile calls are shared by job_pages pages; their tokens are per call.
+        metrics = meta.get("metrics", {})
+        page_metrics[page_no] = metrics
+        if state is not None:
+            state.mark_done(
+                section_name,
+                page_no,
+                page_md_path,
+                crops,
+                model=model,
+                input_hash=meta.get("input_hash"),
+                request_s=metrics.get("request_s"),
+                metrics=metrics,
+            )
+
+    # Requests run concurrently, but results are consumed in page order so the
+    # per-page files and image_records come out the same as a sequential run.
+    if pipeline:
+        stats.set_workers("render", prepare_workers)
+    stats.set_workers("tile", prepare_workers)
+    for stage in ("encode", "gate", "request", "upload", "model", "parse", "recover"):
+        stats.set_workers(stage, concurrency)
+    results = iter_pipeline_results(
+        jobs,
+        prepare_job,
+        request_job,
+        prepare_workers=prepare_workers,
+        request_workers=concurrency,
+        max_in_flight=max(queue_size, concurrency),
+    )
+    try:
+        if tile_pages > 1:
+            for chunk_numbers, (response, raw_text, page_images, meta) in progress_iter(
+                results, desc="Parsing tiles", unit="tile", total=len(jobs)
+            ):
+                if meta.get("skipped"):
+                    continue
+                pages = extract_tile_pages(response, chunk_numbers)
+                recovery = meta.get("recovery")
+                if recovery is not None:
+                    tile_recovery.append(recovery)
+                    if recovery["lost"]:
+                        snippet = raw_text.strip().replace("\n", " ")
+                        if len(snippet) > 400:
+                            snippet = snippet[:400] + "..."
+                        print(
+                            f"Pages {recovery['lost']} still missing after recovery; they are retried on the "
+                            f"next run. Original raw snippet: {snippet}",
+                            file=sys.stderr,
+                        )
+                        if state is not None:
+                            state.mark_failed(section_name, recovery["lost"], "missing from tile response")
+                with stats.timed("write", len(pages)):
+                    for page_item in pages:
+                        page_no_raw = page_item.get("page")
+                        if page_no_raw is None:
+                            print("Skipping tile entry without page number.", file=sys.stderr)
+                            continue
+                        page_no = int(page_no_raw)
+                        if page_no < 1 or page_no > page_count:
+                            print(f"Skipping out-of-range page number: {page_no}", file=sys.stderr)
+                            continue
+                        if not force and page_no in done_pages:
+                            continue
+                        write_page(page_no, page_item, page_images.get(page_no), meta)
+                close_images(page_images)
+        else:
+            for chunk_numbers, (response, _raw_text, page_images, meta) in progress_iter(
+                results, desc="Parsing pages", unit="page", total=len(jobs)
+            ):
+                if meta.get("skipped"):
+                    continue
+                with stats.timed("write"):
+                    write_page(chunk_numbers[0], response, page_images.get(chunk_numbers[0]), meta)
+                close_images(page_images)
+    finally:
+        # Stops the prepare/request threads if the loop above raised.
+        results.close()
+        if render_pool is not None:
+            render_pool.shutdown(cancel_futures=True)
+        if state is not None:
+            state.release(section_name)
+    stats.report(section_name)
+    skipped = [page_no for page_no in range(1, page_count + 1) if page_no not in done_pages]
+    if state is not None and skipped:
+        # Pages claimed by another process (or still failing) are picked up
+        # from the store by whichever run combines the section last.
+        for page_no, entry in state.completed_pages(section_name).items():
+            if page_no <= page_count and page_no not in done_pages:
+                done_pages.add(page_no)
+                image_records[page_no] = entry["image_records"]
+
+    for page_no, source_no in duplicates.items():
+        if (not force and page_no in done_pages) or source_no not in done_pages:
+            continue
+        source_markdown = per_page_markdown.get(source_no)
+        if source_markdown is None:
+            source_path = pages_dir / f"{section_name}_page_{source_no:03d}.md"
+            source_markdown = load_existing_markdown(source_path, archive) or ""
+        # Pages share one directory, so relative crop links stay valid.
+        page_md_path = pages_dir / f"{section_name}_page_{page_no:03d}.md"
+        save_output_text(page_md_path, source_markdown, archive)
+        per_page_markdown[page_no] = source_markdown
+        image_records[page_no] = image_records.get(source_no, [])
+        done_pages.add(page_no)
+        if state is not None:
+            state.mark_done(section_name, page_no, page_md_path, image_records[page_no], route="duplicate")
 
     combined_md_path = markdown_dir / f"{section_name}.md"
-    combined = "\n\n".join(per_page_markdown[k].strip() for k in sorted(per_page_markdown))
+    combined_parts = []
+    for page_no in sorted(done_pages):
+        page_markdown = per_page_markdown.get(page_no)
+        if page_markdown is None:
+            page_md_path = pages_dir / f"{section_name}_page_{page_no:03d}.md"
+            page_markdown = load_existing_markdown(page_md_path, archive) or ""
+        if page_markdown.strip():
+            combined_parts.append(page_markdown.strip())
+    combined = "\n\n".join(combined_parts)
     combined_md_path.write_text(combined + "\n", encoding="utf-8")
 
-    doc.close()
+    with FITZ_LOCK:
+        doc.close()
+    if archive is not None:
+        archive.close()
     return {
         "section": section_name,
         "source_pdf": str(pdf_path),
+        "page_range": list(page_range) if page_range is not None else None,
         "pages": page_count,
         "images_dir": str(images_dir),
         "crops_dir": str(crops_dir),
         "markdown": str(combined_md_path),
         "page_markdown_dir": str(pages_dir),
+        "archive": str(archive.path) if archive is not None else None,
         "tile_pages": tile_pages,
+        "tile_layout": tile_layout,
+        "tile_compose": tile_compose if not in_memory else "in-memory",
+        "tile_plan": tile_plan,
+        "tile_recovery": tile_recovery,
+        "concurrency": concurrency,
+        "pipeline": pipeline,
+        "in_memory": in_memory,
+        "upload_format": upload_format,
+        "fit_inline": fit_inline_payloads,
+        "crop_source": crop_source,
+        "crop_dpi": crop_dpi if crop_source == "pdf" else dpi,
         "bbox_order": BBOX_ORDER,
+        "stage_stats": stats.summary(),
+        "text_fast_path": text_fast_path,
+        "page_routes": page_routes,
+        "page_dedup": page_dedup,
+        "pages_done": len(done_pages),
+        "page_metrics": page_metrics,
         "image_records": image_records,
     }
 
 
+def load_split_sections(config_path: Path) -> List[Dict[str, Any]]:
+    """Sections of a pdf_split config.json as page ranges of its source PDF.
+
+    Names match the section PDFs pdf_split writes, so outputs are the same
+    whether a book is parsed from section files or from the manifest.
+    """
+    config = load_config(config_path)
+    source = Path(config.get("source_pdf", ""))
+    if not config.get("sections"):
+        raise ValueError(f"No sections in split config: {config_path}")
+    if not source.is_file():
+        raise ValueError(f"Source PDF not found: {source}")
+    width = len(str(len(config["sections"])))
+    return [
+        {
+            "name": entry.get("section_name") or f"{entry['index']:0{width}d}_{entry['slug']}",
+            "pdf": source,
+            "page_range": (int(entry["start_page"]), int(entry["end_page"])),
+        }
+        for entry in config["sections"]
+    ]
+
+
+def print_plan(args: argparse.Namespace, sections: List[Dict[str, Any]], out_dir: Path, prompt_path: Path) -> int:
+    """--plan: print the work left per section. Needs no API key and writes nothing."""
+    state: Optional[PageStateStore] = None
+    db_path = out_dir / STATE_FILENAME
+    if not args.no_state and db_path.exists():
+        state = PageStateStore(db_path, read_only=True)
+    rows = [
+        plan_section(
+            section["pdf"],
+            out_dir,
+            args.dpi,
+            args.tile_pages,
+            prompt_path,
+            args.force,
+            state=state,
+            tile_layout=args.tile_layout,
+            tile_max_pixels=args.tile_max_pixels,
+            tile_max_tokens=args.tile_max_tokens,
+            text_fast_path=args.text_fast_path,
+            page_range=section["page_range"],
+            section_name=section["name"],
+            pack=args.pack,
+        )
+        for section in sections
+    ]
+    # Output tokens can only be estimated from pages this output directory
+    # has already parsed.
+    output_per_page = state.output_tokens_per_page() if state is not None else None
+    if state is not None:
+        state.close()
+
+    keys = ("pages", "done", "pending", "local", "model_pages", "calls", "tiles", "input_tokens")
+    totals = {key: sum(row[key] for row in rows) for key in keys}
+    name_width = max([len("section")] + [len(row["section"]) for row in rows])
+    print(
+        f"{'section':<{name_width}} {'pages':>6} {'done':>6} {'pending':>8} {'local':>6} {'calls':>6} "
+        f"{'tiles':>6} {'in tokens':>10} {'out tokens':>10}"
+    )
+    for row in rows + [dict(totals, section="total")]:
+        output_tokens = "-"
+        if output_per_page is not None:
+            output_tokens = f"{round(output_per_page * row['model_pages']):,}"
+        print(
+            f"{row['section']:<{name_width}} {row['pages']:>6} {row['done']:>6} {row['pending']:>8} "
+            f"{row['local']:>6} {row['calls']:>6} {row['tiles']:>6} {row['input_tokens']:>10,} {output_tokens:>10}"
+        )
+    source = "state store" if state is not None else "page files"
+    print(f"Done pages read from the {source} in {out_dir}.")
+    if output_per_page is None:
+        print("No parsed pages with token metrics yet; output tokens not estimated.")
+    else:
+        print(f"Output tokens assume {output_per_page:.0f} per page, the average so far.")
+    notes = []
+    if args.dedup:
+        notes.append("--dedup may skip further blank or repeated pages")
+    if not args.no_cache and args.backend == "gemini":
+        notes.append("response cache hits are not counted")
+    if notes:
+        print(f"Calls and tokens are upper bounds: {'; '.join(notes)}.")
+    return 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Parse PDFs into Markdown using Gemini.")
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--pdf", help="Path to a PDF to parse.")
     group.add_argument("--sections-dir", help="Directory containing section PDFs to parse.")
+    group.add_argument(
+        "--split-config",
+        help="pdf_split config.json whose section page ranges are parsed straight from the source PDF.",
+    )
     parser.add_argument("--out-dir", help="Output directory (default: <pdf-stem>__out).")
     parser.add_argument("--dpi", type=int, default=200, help="DPI for rendering (default: 200).")
-    parser.add_argument("--tile-pages", type=int, default=1, help="Number of pages per tiled image.")
+    parser.add_argument(
+        "--tile-pages",
+        type=int,
+        default=1,
+        help="Number of pages per tiled image (the maximum when a tile budget is set).",
+    )
+    parser.add_argument(
+        "--tile-layout",
+        choices=TILE_LAYOUTS,
+        default="vertical",
+        help="Stack tile pages vertically or pack them into a grid (default: vertical).",
+    )
+    parser.add_argument(
+        "--tile-max-pixels",
+        type=int,
+        help=f"Pixel budget per tile; {INLINE_SIZE_LIMIT // 3} keeps any PNG tile under the inline limit.",
+    )
+    parser.add_argument("--tile-max-tokens", type=int, help="Estimated image-token budget per tile.")
+    parser.add_argument(
+        "--tile-compose",
+        choices=TILE_COMPOSE_MODES,
+        default="canvas",
+        help="Build tile PNGs on a full canvas or stream them row by row to bound memory "
+        "(default: canvas; --in-memory always uses a canvas).",
+    )
     parser.add_argument("--model", default="gemini-2.5-flash", help="Gemini model name.")
     parser.add_argument("--prompt", help="Path to prompt template.")
     parser.add_argument("--api-key", help="Gemini API key override.")
+    parser.add_argument(
+        "--backend",
+        choices=("gemini", "fake"),
+        default="gemini",
+        help="Model backend; 'fake' is a local stand-in for load tests (default: gemini).",
+    )
+    fake = parser.add_argument_group("fake backend", "Latency and faults of --backend fake.")
+    fake.add_argument("--fake-latency-ms", type=float, default=800.0, help="Median call latency (default: 800).")
+    fake.add_argument("--fake-latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    fake.add_argument(
+        "--fake-latency-spread", type=float, default=0.5, help="Lognormal sigma or uniform +/- fraction (default: 0.5)."
+    )
+    fake.add_argument("--fake-rate-limit-rate", type=float, default=0.0, help="Share of calls answered with 429.")
+    fake.add_argument("--fake-retry-delay", type=float, default=1.0, help="retryDelay carried by injected 429s.")
+    fake.add_argument("--fake-daily-quota-rate", type=float, default=0.0, help="Share of calls failing on daily quota.")
+    fake.add_argument("--fake-malformed-rate", type=float, default=0.0, help="Share of calls with truncated JSON.")
+    fake.add_argument("--fake-drop-page-rate", type=float, default=0.0, help="Share of tile pages left out of responses.")
+    fake.add_argument("--fake-images-per-page", type=int, default=1, help="Figures returned per page (default: 1).")
+    fake.add_argument("--fake-seed", type=int, default=0, help="Random seed for the fake backend (default: 0).")
     parser.add_argument("--force", action="store_true", help="Re-parse even if outputs exist.")
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Report pages done and pending, calls, tiles and estimated tokens per section; parse nothing.",
+    )
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent Gemini requests (default: 1).")
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate request when a call runs past the recent latency percentile; first answer wins.",
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=0.95,
+        help="Latency percentile (0-1) after which a call is hedged (default: 0.95).",
+    )
+    parser.add_argument(
+        "--hedge-budget",
+        type=float,
+        default=0.1,
+        help="Max hedge requests as a fraction of primary requests (default: 0.1).",
+    )
+    parser.add_argument(
+        "--malformed-retries",
+        type=int,
+        default=MALFORMED_RETRIES,
+        help=f"Re-send a call this many times on an empty or unparsable reply (default: {MALFORMED_RETRIES}).",
+    )
+    parser.add_argument("--rpm", type=float, help="Shared requests-per-minute limit across workers.")
+    parser.add_argument("--tpm", type=float, help="Shared (estimated) tokens-per-minute limit across workers.")
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Stream render -> tile -> parse -> crop per job instead of rendering every page first.",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="Max jobs in flight between rendering and writing in the pipeline (default: 8).",
+    )
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="Pass rendered pages and tiles between stages in memory (implies --pipeline).",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="Store page Markdown, figure crops and saved page images in one SQLite archive per section "
+        "under packed/ instead of loose files (implies --in-memory; read with page_archive.py).",
+    )
+    parser.add_argument(
+        "--save-page-images",
+        action="store_true",
+        help="With --in-memory, also write page PNGs to images/.",
+    )
+    parser.add_argument(
+        "--upload-format",
+        choices=sorted(UPLOAD_FORMATS),
+        default="png",
+        help="Encoding for images sent to Gemini (default: png).",
+    )
+    parser.add_argument(
+        "--upload-quality",
+        type=int,
+        default=85,
+        help="Quality for jpeg/webp uploads, 1-100 (default: 85).",
+    )
+    parser.add_argument(
+        "--fit-inline",
+        action="store_true",
+        help="Downscale payloads over the inline limit instead of uploading them through the Files API.",
+    )
+    parser.add_argument(
+        "--upload-registry",
+        help=f"Registry of live Files API uploads to reuse (default: {default_upload_registry()}).",
+    )
+    parser.add_argument(
+        "--no-upload-registry",
+        action="store_true",
+        help="Upload oversized payloads every time instead of reusing live handles.",
+    )
+    parser.add_argument(
+        "--text-fast-path",
+        action="store_true",
+        help="Convert plain-prose pages from the PDF text layer locally; send only the rest to Gemini.",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Skip blank pages and reuse results for near-duplicate pages (perceptual hash).",
+    )
+    parser.add_argument(
+        "--dedup-distance",
+        type=int,
+        default=DEFAULT_DEDUP_DISTANCE,
+        help=f"Max differing hash bits (of {DEDUP_HASH_SIZE * DEDUP_HASH_SIZE}) for a repeat page "
+        f"(default: {DEFAULT_DEDUP_DISTANCE}).",
+    )
+    parser.add_argument(
+        "--crop-source",
+        choices=("image", "pdf"),
+        default="pdf",
+        help="Clip-render figure crops from the PDF page or cut them from the page image (default: pdf).",
+    )
+    parser.add_argument(
+        "--crop-dpi",
+        type=int,
+        default=300,
+        help="DPI for --crop-source pdf figure crops (default: 300).",
+    )
+    parser.add_argument("--cache-dir", help=f"Response cache directory (default: {default_cache_dir()}).")
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_BYTES / (1024 * 1024),
+        help="Evict least recently used cache entries beyond this size (default: 2048).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call Gemini; do not read or write the cache (always off for --backend fake).",
+    )
+    parser.add_argument(
+        "--no-state",
+        action="store_true",
+        help=f"Do not record per-page progress in {STATE_FILENAME}; resume by scanning page files.",
+    )
+    parser.add_argument(
+        "--claim-lease",
+        type=float,
+        default=DEFAULT_CLAIM_LEASE_S,
+        help="Seconds before another process may take over a page claimed by a stalled run (default: 600).",
+    )
+    parser.add_argument("--metrics-json", help="Also write this run's manifest entry and page metrics to a JSON file.")
+    parser.add_argument("--metrics-prom", help="Write stage timings and token counters in Prometheus text format.")
+    parser.add_argument(
+        "--section-workers",
+        type=int,
+        default=1,
+        help="Sections parsed at once with --sections-dir; --concurrency stays the total request budget (default: 1).",
+    )
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=1,
+        help="Processes used to rasterise pages (default: 1).",
+    )
     args = parser.parse_args()
 
     if args.tile_pages < 1:
@@ -563,41 +2769,80 @@ def main() -> int:
     if args.dpi <= 0:
         print("--dpi must be > 0", file=sys.stderr)
         return 1
-
-    if tqdm is None:
-        print("tqdm not installed; progress bars disabled. Install with: pip install tqdm", file=sys.stderr)
-
-    ensure_genai()
-    api_key = load_api_key(args.api_key)
-    if not api_key:
-        print("GEMINI_API_KEY is required (set in .env or environment).", file=sys.stderr)
+    for name in ("tile_max_pixels", "tile_max_tokens"):
+        value = getattr(args, name)
+        if value is not None and value <= 0:
+            print(f"--{name.replace('_', '-')} must be > 0", file=sys.stderr)
+            return 1
+    if args.concurrency < 1:
+        print("--concurrency must be >= 1", file=sys.stderr)
+        return 1
+    if args.section_workers < 1:
+        print("--section-workers must be >= 1", file=sys.stderr)
+        return 1
+    if args.render_workers < 1:
+        print("--render-workers must be >= 1", file=sys.stderr)
+        return 1
+    if args.queue_size < 1:
+        print("--queue-size must be >= 1", file=sys.stderr)
+        return 1
+    if not 0 < args.hedge_percentile < 1:
+        print("--hedge-percentile must be between 0 and 1", file=sys.stderr)
+        return 1
+    if args.hedge_budget <= 0:
+        print("--hedge-budget must be > 0", file=sys.stderr)
+        return 1
+    if args.dedup_distance < 0:
+        print("--dedup-distance must be >= 0", file=sys.stderr)
         return 1
+    if args.malformed_retries < 0:
+        print("--malformed-retries must be >= 0", file=sys.stderr)
+        return 1
+    if args.claim_lease <= 0:
+        print("--claim-lease must be > 0", file=sys.stderr)
+        return 1
+    if args.crop_dpi <= 0:
+        print("--crop-dpi must be > 0", file=sys.stderr)
+        return 1
+    if not 1 <= args.upload_quality <= 100:
+        print("--upload-quality must be between 1 and 100", file=sys.stderr)
+        return 1
+    for name in ("rpm", "tpm"):
+        value = getattr(args, name)
+        if value is not None and value <= 0:
+            print(f"--{name} must be > 0", file=sys.stderr)
+            return 1
 
-    client = genai.Client(api_key=api_key)
-    pdf_paths: List[Path] = []
+    # Each section is a PDF (page_range None) or a page range of one.
+    sections: List[Dict[str, Any]] = []
 
     if args.pdf:
         pdf_path = Path(args.pdf).expanduser().resolve()
         if not pdf_path.exists():
             print(f"PDF not found: {pdf_path}", file=sys.stderr)
             return 1
-        pdf_paths = [pdf_path]
+        sections = [{"name": pdf_path.stem, "pdf": pdf_path, "page_range": None}]
         out_dir = Path(args.out_dir).expanduser().resolve() if args.out_dir else pdf_path.parent / f"{pdf_path.stem}__out"
-    else:
+    elif args.sections_dir:
         sections_dir = Path(args.sections_dir).expanduser().resolve()
         if not sections_dir.exists():
             print(f"Sections directory not found: {sections_dir}", file=sys.stderr)
             return 1
-        pdf_paths = sorted(sections_dir.glob("*.pdf"))
-        if not pdf_paths:
+        sections = [
+            {"name": path.stem, "pdf": path, "page_range": None} for path in sorted(sections_dir.glob("*.pdf"))
+        ]
+        if not sections:
             print(f"No PDFs found in {sections_dir}", file=sys.stderr)
             return 1
         out_dir = Path(args.out_dir).expanduser().resolve() if args.out_dir else sections_dir.parent
-
-    ensure_dir(out_dir)
-    config_path = out_dir / "config.json"
-    config = load_config(config_path)
-    parse_runs = config.get("parse_runs", [])
+    else:
+        split_config_path = Path(args.split_config).expanduser().resolve()
+        try:
+            sections = load_split_sections(split_config_path)
+        except ValueError as exc:
+            print(str(exc), file=sys.stderr)
+            return 1
+        out_dir = Path(args.out_dir).expanduser().resolve() if args.out_dir else split_config_path.parent
 
     prompt_path = Path(args.prompt).expanduser().resolve() if args.prompt else None
     if prompt_path is None:
@@ -608,40 +2853,208 @@ def main() -> int:
         print(f"Prompt file not found: {prompt_path}", file=sys.stderr)
         return 1
 
-    run_sections = []
-    try:
-        for pdf_path in pdf_paths:
-            print(f"Parsing {pdf_path.name} with model {args.model}...")
-            run_sections.append(
-                process_pdf(
-                    client=client,
-                    pdf_path=pdf_path,
-                    out_dir=out_dir,
-                    dpi=args.dpi,
-                    tile_pages=args.tile_pages,
-                    model=args.model,
-                    prompt_path=prompt_path,
-                    force=args.force,
-                )
+    if args.plan:
+        return print_plan(args, sections, out_dir, prompt_path)
+
+    if load_tqdm() is None:
+        print("tqdm not installed; progress bars disabled. Install with: pip install tqdm", file=sys.stderr)
+
+    if args.backend == "fake":
+        backend: Any = FakeBackend(
+            latency_ms=args.fake_latency_ms,
+            latency_distribution=args.fake_latency_distribution,
+            latency_spread=args.fake_latency_spread,
+            rate_limit_rate=args.fake_rate_limit_rate,
+            retry_delay_s=args.fake_retry_delay,
+            daily_quota_rate=args.fake_daily_quota_rate,
+            malformed_rate=args.fake_malformed_rate,
+            drop_page_rate=args.fake_drop_page_rate,
+            images_per_page=args.fake_images_per_page,
+            seed=args.fake_seed,
+        )
+    else:
+        ensure_genai()
+        api_key = load_api_key(args.api_key)
+        if not api_key:
+            print("GEMINI_API_KEY is required (set in .env or environment).", file=sys.stderr)
+            return 1
+        uploads = None
+        if not args.no_upload_registry:
+            registry_path = (
+                Path(args.upload_registry).expanduser().resolve() if args.upload_registry else default_upload_registry()
             )
-    except GeminiRateLimitError as exc:
-        print(str(exc), file=sys.stderr)
-        return 1
+            uploads = UploadRegistry(registry_path, scope=credential_fingerprint(api_key))
+        backend = GeminiBackend(genai.Client(api_key=api_key), uploads=uploads)
+    limiter = RateLimiter(args.rpm, args.tpm)
+    hedge: Optional[HedgePolicy] = None
+    if args.hedge:
+        # Primaries plus their hedges, with room for losers still finishing.
+        hedge = HedgePolicy(args.hedge_percentile, args.hedge_budget, max_workers=3 * args.concurrency)
+    cache: Optional[ResponseCache] = None
+    if not args.no_cache and args.backend == "gemini":
+        cache_dir = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else default_cache_dir()
+        cache = ResponseCache(cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    ensure_dir(out_dir)
+    config_path = out_dir / "config.json"
+
+    state: Optional[PageStateStore] = None
+    run_id = None
+    if not args.no_state:
+        state = PageStateStore(out_dir / STATE_FILENAME, lease_s=args.claim_lease)
+        run_id = state.start_run(
+            {"sections": [section["name"] for section in sections], "prompt": str(prompt_path), **vars(args)}
+        )
 
     run_info = {
         "run_at": datetime.now(timezone.utc).isoformat(),
+        "status": "running",
         "model": args.model,
+        "backend": args.backend,
         "prompt": str(prompt_path),
         "dpi": args.dpi,
         "tile_pages": args.tile_pages,
+        "tile_layout": args.tile_layout,
+        "tile_max_pixels": args.tile_max_pixels,
+        "tile_max_tokens": args.tile_max_tokens,
+        "tile_compose": args.tile_compose,
+        "concurrency": args.concurrency,
+        "malformed_retries": args.malformed_retries,
+        "section_workers": args.section_workers,
+        "text_fast_path": args.text_fast_path,
+        "dedup": args.dedup,
+        "fit_inline": args.fit_inline,
+        "render_workers": args.render_workers,
+        "pack": args.pack,
+        "response_cache": str(cache.cache_dir) if cache is not None else None,
+        "state_store": str(state.db_path) if state is not None else None,
+        "rpm": args.rpm,
+        "tpm": args.tpm,
         "bbox_order": BBOX_ORDER,
-        "sections": run_sections,
+        "sections": [],
+        "failed_sections": [],
+        "totals": run_totals([]),
     }
-    parse_runs.append(run_info)
-    config["parse_runs"] = parse_runs
-    save_config(config_path, config)
+    save_run_manifest(config_path, run_info)
+
+    # Sections share the backend, limiter, cache and state store. With more
+    # than one section in flight, --concurrency stays the total number of
+    # requests in flight rather than a per-section figure.
+    section_workers = min(args.section_workers, len(sections))
+    request_gate = threading.BoundedSemaphore(args.concurrency) if section_workers > 1 else None
+
+    def parse_section(section: Dict[str, Any]) -> Dict[str, Any]:
+        print(f"Parsing {section['name']} with model {args.model}...")
+        return process_pdf(
+            backend=backend,
+            pdf_path=section["pdf"],
+            out_dir=out_dir,
+            dpi=args.dpi,
+            tile_pages=args.tile_pages,
+            model=args.model,
+            prompt_path=prompt_path,
+            force=args.force,
+            concurrency=args.concurrency,
+            limiter=limiter,
+            render_workers=args.render_workers,
+            cache=cache,
+            pipeline=args.pipeline,
+            queue_size=args.queue_size,
+            in_memory=args.in_memory,
+            save_page_images=args.save_page_images,
+            upload_format=args.upload_format,
+            upload_quality=args.upload_quality,
+            tile_layout=args.tile_layout,
+            tile_max_pixels=args.tile_max_pixels,
+            tile_max_tokens=args.tile_max_tokens,
+            text_fast_path=args.text_fast_path,
+            crop_source=args.crop_source,
+            crop_dpi=args.crop_dpi,
+            state=state,
+            request_gate=request_gate,
+            dedup=args.dedup,
+            dedup_distance=args.dedup_distance,
+            fit_inline_payloads=args.fit_inline,
+            tile_compose=args.tile_compose,
+            hedge=hedge,
+            malformed_retries=args.malformed_retries,
+            page_range=section["page_range"],
+            section_name=section["name"],
+            pack=args.pack,
+        )
+
+    section_results: Dict[str, Dict[str, Any]] = {}
+    run_status = "done"
+    try:
+        with ThreadPoolExecutor(max_workers=section_workers) as executor:
+            futures = {executor.submit(parse_section, section): section for section in sections}
+            for future in as_completed(futures):
+                section = futures[future]
+                failure = {"section": section["name"], "source_pdf": str(section["pdf"])}
+                if future.cancelled():
+                    continue
+                try:
+                    section_results[section["name"]] = future.result()
+                except GeminiRateLimitError as exc:
+                    # Daily quota is gone for every section; stop queued ones.
+                    print(str(exc), file=sys.stderr)
+                    run_status = "rate_limited"
+                    for other in futures:
+                        other.cancel()
+                    run_info["failed_sections"].append(dict(failure, error=str(exc)))
+                except Exception as exc:
+                    print(f"Failed to parse {section['name']}: {exc}", file=sys.stderr)
+                    if run_status == "done":
+                        run_status = "failed"
+                    run_info["failed_sections"].append(dict(failure, error=str(exc)))
+                run_info["sections"] = [
+                    section_results[item["name"]] for item in sections if item["name"] in section_results
+                ]
+                run_info["totals"] = run_totals(run_info["sections"])
+                save_run_manifest(config_path, run_info)
+    finally:
+        if state is not None:
+            state.finish_run(run_id, run_status)
+            state.close()
+        if hedge is not None:
+            hedge.shutdown()
+    if cache is not None:
+        print(f"Response cache: {cache.hits} hit(s), {cache.misses} miss(es) in {cache.cache_dir}")
+    uploads = getattr(backend, "uploads", None)
+    if uploads is not None and (uploads.reused or uploads.uploaded):
+        print(f"Uploads: {uploads.reused} reused, {uploads.uploaded} new in {uploads.path}")
+
+    run_info["status"] = run_status
+    if hedge is not None:
+        run_info["hedging"] = hedge.summary()
+        hedging = run_info["hedging"]
+        print(
+            f"Hedging: {hedging['hedges']} hedge(s) for {hedging['primaries']} call(s), "
+            f"{hedging['wins']} won by the hedge."
+        )
+    save_run_manifest(config_path, run_info)
     print(f"Updated config: {config_path}")
-    return 0
+    totals = run_info.get("totals") or run_totals([])
+    if totals["counters"]:
+        counters = totals["counters"]
+        print(
+            f"Tokens: {counters.get('input_tokens', 0)} in, {counters.get('output_tokens', 0)} out "
+            f"over {counters.get('requests', 0)} request(s)."
+        )
+        if counters.get("hedges"):
+            print(
+                f"Losing hedged calls: {counters.get('hedge_input_tokens', 0)} in, "
+                f"{counters.get('hedge_output_tokens', 0)} out."
+            )
+    if args.metrics_json:
+        metrics_path = Path(args.metrics_json).expanduser().resolve()
+        write_text_atomic(metrics_path, json.dumps(run_info, indent=2, ensure_ascii=True) + "\n")
+        print(f"Wrote metrics: {metrics_path}")
+    if args.metrics_prom:
+        metrics_path = Path(args.metrics_prom).expanduser().resolve()
+        write_text_atomic(metrics_path, format_prometheus(run_info))
+        print(f"Wrote metrics: {metrics_path}")
+    return 0 if run_status == "done" else 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from fake_gemini import LATENCY_DISTRIBUTIONS, FakeBackend
+from gemini_cache import UploadRegistry
+from model_client import INLINE_SIZE_LIMIT
+from pdf_parse import (
+    MALFORMED_RETRIES,
+    UPLOAD_FORMATS,
+    GeminiRateLimitError,
+    HedgePolicy,
+    RateLimiter,
+    process_pdf,
+)
+
+
+def build_synthetic_pdf(path: Path, pages: int) -> Path:
+    doc = fitz.open()
+    for index in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Synthetic page {index + 1}", fontsize=20)
+        page.insert_textbox(
+            fitz.Rect(72, 100, page.rect.width - 72, page.rect.height / 2),
+            "Benchmark filler text for the fake Gemini backend. " * 40,
+            fontsize=10,
+        )
+        page.draw_rect(fitz.Rect(120, 480, 480, 720), color=(0, 0, 0), fill=(0.6, 0.7, 0.9))
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def parse_int_list(value: str) -> List[int]:
+    items = [int(item) for item in value.split(",") if item.strip()]
+    if not items or any(item < 1 for item in items):
+        raise argparse.ArgumentTypeError("expected a comma-separated list of integers >= 1")
+    return items
+
+
+def run_case(
+    pdf_paths: List[Path], concurrency: int, args: argparse.Namespace, uploads: Optional[UploadRegistry] = None
+) -> Dict[str, Any]:
+    backend = FakeBackend(
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution,
+        latency_spread=args.latency_spread,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_delay_s=args.retry_delay,
+        malformed_rate=args.malformed_rate,
+        drop_page_rate=args.drop_page_rate,
+        images_per_page=args.images_per_page,
+        seed=args.seed,
+        inline_limit=int(args.inline_limit_mb * 1024 * 1024),
+        upload_latency_ms=args.upload_latency_ms,
+        uploads=uploads,
+    )
+    limiter = RateLimiter(args.rpm, None)
+    hedge = None
+    if args.hedge:
+        hedge = HedgePolicy(args.hedge_percentile, args.hedge_budget, max_workers=3 * concurrency)
+    prompt_name = "tile_prompt.txt" if args.tile_pages > 1 else "page_prompt.txt"
+    prompt_path = Path(__file__).parent / "prompts" / prompt_name
+    stage_busy: Dict[str, float] = {}
+    hedge_tokens = 0
+    pages = 0
+    pages_done = 0
+    jobs = 0
+    recovered = 0
+    lost = 0
+    error = None
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="pdf_parse_bench_") as tmp:
+        for pdf_path in pdf_paths:
+            try:
+                result = process_pdf(
+                    backend=backend,
+                    pdf_path=pdf_path,
+                    out_dir=Path(tmp),
+                    dpi=args.dpi,
+                    tile_pages=args.tile_pages,
+                    model="fake-model",
+                    prompt_path=prompt_path,
+                    force=True,
+                    concurrency=concurrency,
+                    limiter=limiter,
+                    render_workers=args.render_workers,
+                    pipeline=args.pipeline,
+                    queue_size=args.queue_size,
+                    in_memory=args.in_memory,
+                    upload_format=args.upload_format,
+                    fit_inline_payloads=args.fit_inline,
+                    hedge=hedge,
+                    malformed_retries=args.malformed_retries,
+                )
+            except (GeminiRateLimitError, RuntimeError) as exc:
+                error = str(exc)
+                break
+            pages += result["pages"]
+            pages_done += result["pages_done"]
+            for recovery in result["tile_recovery"]:
+                recovered += len(recovery["recovered"])
+                lost += len(recovery["lost"])
+            jobs += len(result["tile_plan"]) if args.tile_pages > 1 else result["pages"]
+            for stage, entry in result["stage_stats"]["stages"].items():
+                stage_busy[stage] = stage_busy.get(stage, 0.0) + entry["busy_s"]
+            counters = result["stage_stats"]["counters"]
+            hedge_tokens += counters.get("hedge_input_tokens", 0) + counters.get("hedge_output_tokens", 0)
+    elapsed = time.perf_counter() - started
+    if hedge is not None:
+        hedge.shutdown()
+    calls = backend.counters["calls"]
+    return {
+        "concurrency": concurrency,
+        "pages": pages,
+        "wall_s": round(elapsed, 3),
+        "pages_per_min": round(pages / elapsed * 60.0, 1) if elapsed > 0 else None,
+        "calls": calls,
+        "extra_calls": max(0, calls - jobs),
+        "rate_limited": backend.counters["rate_limited"],
+        "malformed": backend.counters["malformed"],
+        "uploads": backend.counters["uploads"],
+        "pages_done": pages_done,
+        "dropped_pages": backend.counters["dropped_pages"],
+        "recovered_pages": recovered,
+        "lost_pages": lost,
+        "hedging": dict(hedge.summary(), loser_tokens=hedge_tokens) if hedge is not None else None,
+        "retry_wait_s": round(stage_busy.get("retry", 0.0), 3),
+        "stage_busy_s": {stage: round(value, 3) for stage, value in sorted(stage_busy.items())},
+        "error": error,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pdf_parse against the local fake Gemini backend.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--pdf", action="append", help="PDF to parse (repeatable).")
+    source.add_argument("--sections-dir", help="Directory of section PDFs to parse.")
+    parser.add_argument("--pages", type=int, default=40, help="Pages in the synthetic PDF (default: 40).")
+    parser.add_argument("--concurrency", type=parse_int_list, default=[1, 4, 8], help="Comma list (default: 1,4,8).")
+    parser.add_argument("--dpi", type=int, default=100, help="Render DPI (default: 100).")
+    parser.add_argument("--tile-pages", type=int, default=1, help="Pages per tile (default: 1).")
+    parser.add_argument("--render-workers", type=int, default=1, help="Render processes (default: 1).")
+    parser.add_argument("--pipeline", action="store_true", help="Use the streaming pipeline.")
+    parser.add_argument("--in-memory", action="store_true", help="Use the in-memory image path.")
+    parser.add_argument("--queue-size", type=int, default=8, help="Pipeline jobs in flight (default: 8).")
+    parser.add_argument("--upload-format", choices=sorted(UPLOAD_FORMATS), default="png")
+    parser.add_argument("--fit-inline", action="store_true", help="Downscale payloads over the inline limit.")
+    parser.add_argument(
+        "--inline-limit-mb",
+        type=float,
+        default=INLINE_SIZE_LIMIT / (1024 * 1024),
+        help="Fake backend inline limit; lower it to exercise uploads (default: 18).",
+    )
+    parser.add_argument("--upload-latency-ms", type=float, default=1500.0, help="Fake upload time (default: 1500).")
+    parser.add_argument(
+        "--reuse-uploads",
+        action="store_true",
+        help="Share one upload registry across cases, so later cases reuse earlier uploads.",
+    )
+    parser.add_argument("--hedge", action="store_true", help="Hedge slow calls (see pdf_parse --hedge).")
+    parser.add_argument("--hedge-percentile", type=float, default=0.95, help="Hedge after this latency percentile.")
+    parser.add_argument("--hedge-budget", type=float, default=0.1, help="Max hedges per primary call.")
+    parser.add_argument("--rpm", type=float, help="Shared requests-per-minute limit.")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Median model latency (default: 800).")
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="Lognormal sigma or uniform +/- fraction.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls answered with 429.")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="retryDelay carried by injected 429s.")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of calls with truncated JSON.")
+    parser.add_argument(
+        "--malformed-retries",
+        type=int,
+        default=MALFORMED_RETRIES,
+        help=f"Re-sends per call on a malformed reply (default: {MALFORMED_RETRIES}).",
+    )
+    parser.add_argument("--drop-page-rate", type=float, default=0.0, help="Share of tile pages left out of responses.")
+    parser.add_argument("--images-per-page", type=int, default=1, help="Figures returned per page (default: 1).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the fake backend.")
+    parser.add_argument(
+        "--require-complete",
+        action="store_true",
+        help="Exit 1 if any case stopped early, e.g. a section failed on injected faults.",
+    )
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pdf_parse_bench_src_") as src_tmp:
+        if args.pdf:
+            pdf_paths = [Path(item).expanduser().resolve() for item in args.pdf]
+        elif args.sections_dir:
+            pdf_paths = sorted(Path(args.sections_dir).expanduser().resolve().glob("*.pdf"))
+        else:
+            pdf_paths = [build_synthetic_pdf(Path(src_tmp) / "synthetic.pdf", args.pages)]
+        missing = [path for path in pdf_paths if not path.exists()]
+        if not pdf_paths or missing:
+            print(f"No input PDFs found: {missing or args.sections_dir}", file=sys.stderr)
+            return 1
+
+        uploads = UploadRegistry(Path(src_tmp) / "uploads.json") if args.reuse_uploads else None
+        results = []
+        for concurrency in args.concurrency:
+            print(f"Running concurrency={concurrency} over {len(pdf_paths)} PDF(s)...")
+            results.append(run_case(pdf_paths, concurrency, args, uploads))
+
+    print()
+    print(
+        f"{'conc':>4} {'pages':>6} {'wall s':>8} {'pages/min':>10} {'calls':>6} {'429s':>5} {'bad':>4} "
+        f"{'retry s':>8} {'uploads':>8}"
+    )
+    for row in results:
+        print(
+            f"{row['concurrency']:>4} {row['pages']:>6} {row['wall_s']:>8.1f} {row['pages_per_min'] or 0:>10.1f} "
+            f"{row['calls']:>6} {row['rate_limited']:>5} {row['malformed']:>4} {row['retry_wait_s']:>8.1f} "
+            f"{row['uploads']:>8}"
+        )
+        stages = ", ".join(f"{stage} {value:.1f}s" for stage, value in row["stage_busy_s"].items())
+        print(f"     stage busy: {stages}")
+        if row["dropped_pages"]:
+            print(
+                f"     tile pages dropped: {row['dropped_pages']}, recovered {row['recovered_pages']}, "
+                f"lost {row['lost_pages']} ({row['pages_done']}/{row['pages']} pages written)"
+            )
+        if row["hedging"]:
+            hedging = row["hedging"]
+            delay = f"{hedging['delay_s']}s" if hedging["delay_s"] is not None else "n/a"
+            print(
+                f"     hedges: {hedging['hedges']} sent, {hedging['wins']} won, delay {delay}, "
+                f"{hedging['loser_tokens']} tokens on losing calls"
+            )
+        if row["error"]:
+            print(f"     stopped early: {row['error']}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {args.json}")
+    stopped = [row["concurrency"] for row in results if row["error"]]
+    if args.require_complete and stopped:
+        print(f"Cases stopped early at concurrency {stopped}.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,39 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import math
+import multiprocessing
+import os
 import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 import fitz  # PyMuPDF
 
+# Source document of the current writer or scanner process, opened once by open_source.
+_SOURCE_DOC: Optional[fitz.Document] = None
+# Workers reopen the source by path, so spawn them rather than fork a parent
+# that may hold an open Document.
+PROCESS_CONTEXT = multiprocessing.get_context("spawn")
+
+# Chapter detection (PDFs without a TOC): a heading is a short line set at
+# least HEADING_MIN_RATIO times the body font size in the top part of a page.
+HEADING_MIN_RATIO = 1.3
+HEADING_TOP_FRACTION = 0.4
+HEADING_MAX_WORDS = 15
+HEADING_MAX_REPEATS = 3
+SPARSE_PAGE_CHARS = 200
+DEFAULT_MIN_CONFIDENCE = 0.5
+CHAPTER_WORD_RE = re.compile(
+    r"^(chapter|part|book|appendix|lecture|lesson|unit|prologue|epilogue|introduction|preface|conclusion)\b"
+    r"|^([0-9]+|[ivxlc]+)[.:]?(\s|$)",
+    re.IGNORECASE,
+)
+
 
 def slugify(text: str) -> str:
     normalized = re.sub(r"[^a-zA-Z0-9]+", "-", text.strip().lower())
@@ -29,6 +54,34 @@ def save_config(config_path: Path, config: dict) -> None:
     config_path.write_text(json.dumps(config, indent=2, ensure_ascii=True) + "\n", encoding="utf-8")
 
 
+def toc_ranges(toc_entries: list, page_count: int) -> list[dict]:
+    """Page range of every TOC entry, nested under its parent entry.
+
+    One pass with a stack of open entries: an entry ends the page before the
+    next entry at its level or above starts, or at the last page.
+    """
+    nodes: list[dict] = []
+    stack: list[dict] = []
+    for entry in toc_entries:
+        node = {
+            "title": str(entry["title"]).strip(),
+            "level": entry["level"],
+            "start_page": max(1, min(page_count, int(entry["page"]))),
+            "end_page": page_count,
+            "children": [],
+        }
+        next_end = max(1, min(page_count, int(entry["page"]) - 1))
+        while stack and stack[-1]["level"] >= node["level"]:
+            closed = stack.pop()
+            closed["end_page"] = max(closed["start_page"], next_end)
+        node["root"] = not stack
+        if stack:
+            stack[-1]["children"].append(node)
+        stack.append(node)
+        nodes.append(node)
+    return nodes
+
+
 def build_sections(doc: fitz.Document, toc_entries: list, requested_level: int) -> Tuple[Optional[int], list]:
     if not toc_entries:
         return None, []
@@ -37,66 +90,359 @@ def build_sections(doc: fitz.Document, toc_entries: list, requested_level: int)
     effective_level = requested_level if requested_level in levels else levels[0]
 
     sections = []
-    page_count = doc.page_count
+    for node in toc_ranges(toc_entries, doc.page_count):
+        if node["level"] != effective_level:
+            continue
+        sections.append(
+            {
+                "title": node["title"] or f"Section {len(sections) + 1}",
+                "start_page": node["start_page"],
+                "end_page": node["end_page"],
+            }
+        )
+    return effective_level, sections
+
+
+def page_span(item: dict) -> int:
+    return item["end_page"] - item["start_page"] + 1
+
+
+def split_to_budget(node: dict, max_pages: int) -> list[dict]:
+    """Pieces of at most `max_pages` pages, descending into sub-entries where the TOC has them.
+
+    Pages between an entry's start and its first sub-entry are treated like an
+    entry without sub-entries: kept whole if they fit, otherwise cut into
+    equal page chunks.
+    """
+    part = {key: node[key] for key in ("title", "level", "start_page", "end_page")}
+    if page_span(node) <= max_pages:
+        return [dict(part, parts=[part])]
+    if node["children"]:
+        pieces = []
+        first_child = node["children"][0]["start_page"]
+        if first_child > node["start_page"]:
+            pieces.extend(split_to_budget(dict(part, end_page=first_child - 1, children=[]), max_pages))
+        for child in node["children"]:
+            pieces.extend(split_to_budget(child, max_pages))
+        return pieces
+    count = math.ceil(page_span(node) / max_pages)
+    size = math.ceil(page_span(node) / count)
+    pieces = []
+    for index, start_page in enumerate(range(node["start_page"], node["end_page"] + 1, size), start=1):
+        chunk = dict(
+            part,
+            title=f"{node['title']} (part {index} of {count})",
+            start_page=start_page,
+            end_page=min(node["end_page"], start_page + size - 1),
+        )
+        pieces.append(dict(chunk, parts=[chunk]))
+    return pieces
+
+
+def merge_pieces(pieces: list[dict], min_pages: int, max_pages: int) -> list[dict]:
+    """Merge neighbouring pieces while one of them is under `min_pages` and the result fits `max_pages`."""
+    merged: list[dict] = []
+    for piece in pieces:
+        if merged:
+            last = merged[-1]
+            small = page_span(last) < min_pages or page_span(piece) < min_pages
+            contiguous = piece["start_page"] == last["end_page"] + 1
+            if small and contiguous and page_span(last) + page_span(piece) <= max_pages:
+                last["end_page"] = piece["end_page"]
+                last["parts"] = last["parts"] + piece["parts"]
+                continue
+        merged.append(dict(piece))
+    for piece in merged:
+        if len(piece["parts"]) > 1:
+            piece["title"] = f"{piece['parts'][0]['title']} - {piece['parts'][-1]['title']}"
+    return merged
+
+
+def balance_sections(toc_entries: list, page_count: int, min_pages: int, max_pages: int) -> list[dict]:
+    """Sections from the top TOC level, split and merged towards `min_pages`-`max_pages` pages each.
+
+    Each section keeps the TOC entries it covers under `parts`.
+    """
+    pieces: list[dict] = []
+    for node in toc_ranges(toc_entries, page_count):
+        if node["root"]:
+            pieces.extend(split_to_budget(node, max_pages))
+    sections = []
+    for piece in merge_pieces(pieces, min_pages, max_pages):
+        title = piece["title"] or f"Section {len(sections) + 1}"
+        sections.append(
+            {
+                "title": title,
+                "start_page": piece["start_page"],
+                "end_page": piece["end_page"],
+                "parts": piece["parts"],
+            }
+        )
+    return sections
+
+
+def parse_page_budget(value: str) -> Tuple[int, int]:
+    try:
+        low, high = (int(item) for item in value.split("-", 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected MIN-MAX pages, e.g. 20-80") from None
+    if low < 1 or high < low:
+        raise argparse.ArgumentTypeError("expected 1 <= MIN <= MAX")
+    return low, high
+
+
+def scan_page_layout(indices: list[int]) -> list[dict]:
+    """Font-size statistics and the largest top-most line of each page (0-based indices).
 
-    for idx, entry in enumerate(toc_entries):
-        level = entry["level"]
-        if level != effective_level:
+    Runs in scanner processes against the document opened by open_source.
+    """
+    results = []
+    for index in indices:
+        page = _SOURCE_DOC.load_page(index)
+        height = page.rect.height or 1.0
+        sizes: Dict[float, int] = {}
+        lines = []
+        for block in page.get_text("dict")["blocks"]:
+            if block.get("type") != 0:
+                continue
+            for line in block["lines"]:
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                chars = sum(len(span["text"].strip()) for span in spans)
+                size = round(max(span["size"] for span in spans), 1)
+                sizes[size] = sizes.get(size, 0) + chars
+                text = " ".join(span["text"].strip() for span in spans)
+                lines.append({"size": size, "top": line["bbox"][1] / height, "text": text})
+        heading = None
+        if lines:
+            lines.sort(key=lambda item: item["top"])
+            largest = max(item["size"] for item in lines)
+            # Consecutive largest-size lines form one heading ("Chapter 3" / "Title").
+            first = next(position for position, item in enumerate(lines) if item["size"] == largest)
+            parts = [lines[first]["text"]]
+            for item in lines[first + 1 :]:
+                if item["size"] != largest:
+                    break
+                parts.append(item["text"])
+            heading = {
+                "size": largest,
+                "top": lines[first]["top"],
+                "text": " ".join(parts),
+                "first_on_page": first == 0,
+            }
+        results.append({"page": index + 1, "chars": sum(sizes.values()), "sizes": sizes, "heading": heading})
+    return results
+
+
+def detect_chapters(
+    pdf_path: Path,
+    page_count: int,
+    workers: int = 1,
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    min_pages: int = 2,
+) -> Dict[str, Any]:
+    """Guess chapter start pages from layout when a PDF has no TOC.
+
+    Pages are scanned in parallel. The body font size is the size carrying
+    the most characters in the whole document. A page's heading scores on
+    its size ratio to that, how high it sits, whether it reads like a chapter
+    title and whether it opens the page or follows a sparse page. Headings
+    repeated on many pages (running heads) are ignored.
+    """
+    slice_size = max(1, math.ceil(page_count / max(1, workers * 4)))
+    slices = [list(range(start, min(page_count, start + slice_size))) for start in range(0, page_count, slice_size)]
+    pages: list[dict] = []
+    if workers <= 1:
+        open_source(str(pdf_path))
+        try:
+            for chunk in slices:
+                pages.extend(scan_page_layout(chunk))
+        finally:
+            close_source()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=PROCESS_CONTEXT, initializer=open_source, initargs=(str(pdf_path),)
+        ) as pool:
+            for chunk_pages in pool.map(scan_page_layout, slices):
+                pages.extend(chunk_pages)
+
+    size_chars: Dict[float, int] = {}
+    for page in pages:
+        for size, chars in page["sizes"].items():
+            size_chars[size] = size_chars.get(size, 0) + chars
+    if not size_chars:
+        return {"body_size": None, "candidates": [], "starts": []}
+    body_size = max(size_chars, key=lambda size: size_chars[size])
+    heading_counts: Dict[str, int] = {}
+    for page in pages:
+        if page["heading"]:
+            key = page["heading"]["text"].lower()
+            heading_counts[key] = heading_counts.get(key, 0) + 1
+
+    candidates = []
+    for position, page in enumerate(pages):
+        heading = page["heading"]
+        if heading is None:
+            continue
+        ratio = heading["size"] / body_size
+        words = len(heading["text"].split())
+        if ratio < HEADING_MIN_RATIO or heading["top"] > HEADING_TOP_FRACTION or words > HEADING_MAX_WORDS:
             continue
-        title = entry["title"]
-        start_page = max(1, min(page_count, int(entry["page"])))
-        end_page = page_count
-        for next_idx in range(idx + 1, len(toc_entries)):
-            next_entry = toc_entries[next_idx]
-            next_level = next_entry["level"]
-            if next_level <= effective_level:
-                end_page = max(1, min(page_count, int(next_entry["page"]) - 1))
-                break
-        if end_page < start_page:
-            end_page = start_page
+        if heading_counts[heading["text"].lower()] > HEADING_MAX_REPEATS:
+            continue
+        after_sparse = position == 0 or pages[position - 1]["chars"] < SPARSE_PAGE_CHARS
+        confidence = (
+            0.4 * min(1.0, (ratio - 1.0) / 1.0)
+            + 0.2 * (1.0 - heading["top"] / HEADING_TOP_FRACTION)
+            + 0.25 * (1.0 if CHAPTER_WORD_RE.match(heading["text"]) else 0.0)
+            + 0.15 * (1.0 if heading["first_on_page"] or after_sparse else 0.0)
+        )
+        candidates.append(
+            {
+                "page": page["page"],
+                "title": heading["text"][:120],
+                "size_ratio": round(ratio, 2),
+                "confidence": round(confidence, 2),
+            }
+        )
+
+    # Chapter starts closer than min_pages keep the more confident one.
+    starts: list[dict] = []
+    for candidate in candidates:
+        if candidate["confidence"] < min_confidence:
+            continue
+        if starts and candidate["page"] - starts[-1]["page"] < min_pages:
+            if candidate["confidence"] > starts[-1]["confidence"]:
+                starts[-1] = candidate
+            continue
+        starts.append(candidate)
+    return {"body_size": body_size, "candidates": candidates, "starts": starts}
+
+
+def sections_from_starts(starts: list[dict], page_count: int, front_title: str) -> list[dict]:
+    sections = []
+    if starts[0]["page"] > 1:
+        sections.append({"title": front_title, "start_page": 1, "end_page": starts[0]["page"] - 1, "confidence": None})
+    for position, start in enumerate(starts):
+        end_page = starts[position + 1]["page"] - 1 if position + 1 < len(starts) else page_count
         sections.append(
             {
-                "title": str(title).strip() or f"Section {len(sections) + 1}",
-                "start_page": start_page,
+                "title": start["title"],
+                "start_page": start["page"],
                 "end_page": end_page,
+                "confidence": start["confidence"],
             }
         )
-    return effective_level, sections
+    return sections
+
+
+def save_options(garbage: int = 3, deflate: bool = True, object_streams: bool = False) -> Dict[str, Any]:
+    """fitz save() keywords for section PDFs.
+
+    garbage 1-2 drops unused objects, 3 also merges duplicate objects and 4
+    duplicate streams, so fonts and images shared by a section's pages are
+    written once.
+    """
+    return {
+        "garbage": garbage,
+        "deflate": deflate,
+        "deflate_images": deflate,
+        "deflate_fonts": deflate,
+        "use_objstms": int(object_streams),
+    }
+
+
+def open_source(pdf_path: str) -> None:
+    """Writer-pool initializer: each worker keeps one handle on the source PDF."""
+    global _SOURCE_DOC
+    _SOURCE_DOC = fitz.open(pdf_path)
+
+
+def close_source() -> None:
+    """Release the handle open_source took, when it was opened in this process."""
+    global _SOURCE_DOC
+    if _SOURCE_DOC is not None:
+        _SOURCE_DOC.close()
+        _SOURCE_DOC = None
+
+
+def write_section_pdf(start_page: int, end_page: int, output_path: str, options: Dict[str, Any]) -> Tuple[int, float]:
+    started = time.perf_counter()
+    new_doc = fitz.open()
+    new_doc.insert_pdf(_SOURCE_DOC, from_page=start_page - 1, to_page=end_page - 1)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    new_doc.save(tmp_path, **options)
+    new_doc.close()
+    os.replace(tmp_path, output_path)
+    return os.path.getsize(output_path), time.perf_counter() - started
 
 
 def write_sections(
-    doc: fitz.Document,
+    pdf_path: Path,
     sections: list[dict],
     sections_dir: Path,
     dry_run: bool,
+    workers: int = 1,
+    options: Optional[Dict[str, Any]] = None,
 ) -> list[dict]:
     if not sections:
         return []
+    options = options if options is not None else save_options()
     width = len(str(len(sections)))
     outputs = []
     for index, section in enumerate(sections, start=1):
         slug = slugify(section["title"])
         filename = f"{index:0{width}d}_{slug}.pdf"
         output_path = sections_dir / filename
-        if not dry_run:
-            new_doc = fitz.open()
-            new_doc.insert_pdf(
-                doc,
-                from_page=section["start_page"] - 1,
-                to_page=section["end_page"] - 1,
-            )
-            new_doc.save(output_path)
-            new_doc.close()
         outputs.append(
             {
                 "index": index,
                 "title": section["title"],
                 "slug": slug,
+                "section_name": output_path.stem,
                 "start_page": section["start_page"],
                 "end_page": section["end_page"],
                 "output_pdf": str(output_path),
             }
         )
+        for key in ("parts", "confidence"):
+            if key in section:
+                outputs[-1][key] = section[key]
+    if dry_run:
+        return outputs
+
+    # Longest sections first, so a big chapter does not start last and leave
+    # the other workers idle.
+    pending = sorted(outputs, key=lambda item: item["end_page"] - item["start_page"], reverse=True)
+    workers = min(workers, len(pending))
+
+    def record(output: dict, written: Tuple[int, float]) -> None:
+        output["bytes"], elapsed = written
+        output["write_s"] = round(elapsed, 3)
+        print(
+            f"Wrote [{output['index']}] {Path(output['output_pdf']).name}: "
+            f"{output['bytes'] / (1024 * 1024):.1f} MB in {elapsed:.2f}s"
+        )
+
+    if workers <= 1:
+        open_source(str(pdf_path))
+        try:
+            for output in pending:
+                written = write_section_pdf(output["start_page"], output["end_page"], output["output_pdf"], options)
+                record(output, written)
+        finally:
+            close_source()
+        return outputs
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=PROCESS_CONTEXT, initializer=open_source, initargs=(str(pdf_path),)
+    ) as pool:
+        futures = {
+            pool.submit(write_section_pdf, output["start_page"], output["end_page"], output["output_pdf"], options): output
+            for output in pending
+        }
+        for future in as_completed(futures):
+            record(futures[future], future.result())
     return outputs
 
 
@@ -104,10 +450,63 @@ def main() -> int:
     parser = argparse.ArgumentParser(description="Split a PDF into sections using its TOC.")
     parser.add_argument("--pdf", required=True, help="Path to the PDF to split.")
     parser.add_argument("--toc-level", type=int, default=1, help="TOC level to split on (default: 1).")
+    parser.add_argument(
+        "--balance",
+        type=parse_page_budget,
+        metavar="MIN-MAX",
+        help="Ignore --toc-level and aim for MIN-MAX pages per section, descending into sub-entries "
+        "of long chapters and merging short neighbours.",
+    )
     parser.add_argument("--out-dir", help="Output directory (default: <pdf-stem>__out).")
     parser.add_argument("--dry-run", action="store_true", help="Inspect TOC and ranges without writing PDFs.")
+    parser.add_argument(
+        "--manifest-only",
+        action="store_true",
+        help="Record section page ranges in config.json without writing section PDFs "
+        "(parse them with pdf_parse.py --split-config).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes writing section PDFs and scanning pages for chapters (default: 1).",
+    )
+    parser.add_argument(
+        "--no-detect-chapters",
+        action="store_true",
+        help="Without a TOC, keep the whole PDF as one section instead of detecting chapter headings.",
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help=f"Minimum score (0-1) for a detected chapter start (default: {DEFAULT_MIN_CONFIDENCE}).",
+    )
+    parser.add_argument(
+        "--min-chapter-pages",
+        type=int,
+        default=2,
+        help="Minimum pages between detected chapter starts (default: 2).",
+    )
+    parser.add_argument(
+        "--garbage",
+        type=int,
+        choices=range(5),
+        default=3,
+        help="Save garbage collection: 1-2 drop unused objects, 3 merges duplicate objects, "
+        "4 also duplicate streams (default: 3).",
+    )
+    parser.add_argument("--no-deflate", action="store_true", help="Do not compress streams, fonts and images.")
+    parser.add_argument("--object-streams", action="store_true", help="Pack objects into compressed object streams.")
     args = parser.parse_args()
 
+    if args.workers < 1:
+        print("--workers must be >= 1", file=sys.stderr)
+        return 1
+    if args.min_chapter_pages < 1:
+        print("--min-chapter-pages must be >= 1", file=sys.stderr)
+        return 1
+
     pdf_path = Path(args.pdf).expanduser().resolve()
     if not pdf_path.exists():
         print(f"PDF not found: {pdf_path}", file=sys.stderr)
@@ -115,14 +514,39 @@ def main() -> int:
 
     out_dir = Path(args.out_dir).expanduser().resolve() if args.out_dir else pdf_path.parent / f"{pdf_path.stem}__out"
     sections_dir = out_dir / "sections"
-    if not args.dry_run:
+    if not args.dry_run and not args.manifest_only:
         sections_dir.mkdir(parents=True, exist_ok=True)
 
     doc = fitz.open(pdf_path)
     toc = doc.get_toc()
     toc_entries = [{"level": t[0], "title": t[1], "page": t[2]} for t in toc]
 
-    if not toc_entries:
+    detection = None
+    if not toc_entries and not args.no_detect_chapters:
+        detection = detect_chapters(
+            pdf_path,
+            doc.page_count,
+            workers=args.workers,
+            min_confidence=args.min_confidence,
+            min_pages=args.min_chapter_pages,
+        )
+        accepted = {start["page"] for start in detection["starts"]}
+        if detection["body_size"] is None:
+            print(f"No TOC detected and no text layer in {doc.page_count} pages; chapter detection needs text.")
+        else:
+            print(f"No TOC detected; scanned {doc.page_count} pages (body text {detection['body_size']}pt).")
+        for candidate in detection["candidates"]:
+            mark = "*" if candidate["page"] in accepted else " "
+            print(
+                f"  {mark} page {candidate['page']:>5}  confidence {candidate['confidence']:.2f}  "
+                f"size x{candidate['size_ratio']:.2f}  {candidate['title']}"
+            )
+        print(f"Detected {len(accepted)} chapter start(s) (* = used, confidence >= {args.min_confidence}).")
+
+    if not toc_entries and detection and detection["starts"]:
+        sections = sections_from_starts(detection["starts"], doc.page_count, "Front matter")
+        effective_level = None
+    elif not toc_entries:
         print("No TOC detected; falling back to full PDF.")
         sections = [
             {
@@ -132,17 +556,41 @@ def main() -> int:
             }
         ]
         effective_level = None
+    elif args.balance:
+        effective_level = None
+        sections = balance_sections(toc_entries, doc.page_count, *args.balance)
+        spans = [section["end_page"] - section["start_page"] + 1 for section in sections]
+        levels = sorted({part["level"] for section in sections for part in section["parts"]})
+        print(
+            f"TOC entries: {len(toc_entries)}. Balanced into {len(sections)} sections of "
+            f"{min(spans)}-{max(spans)} pages using levels {levels}."
+        )
     else:
         effective_level, sections = build_sections(doc, toc_entries, args.toc_level)
         print(f"TOC entries: {len(toc_entries)}. Using level {effective_level} for splitting.")
 
-    outputs = write_sections(doc, sections, sections_dir, args.dry_run)
+    options = save_options(args.garbage, not args.no_deflate, args.object_streams)
+    started = time.perf_counter()
+    skip_write = args.dry_run or args.manifest_only
+    outputs = write_sections(pdf_path, sections, sections_dir, skip_write, workers=args.workers, options=options)
+    elapsed = time.perf_counter() - started
+    if args.manifest_only:
+        # Virtual sections: pdf_parse reads these page ranges from the source.
+        for output in outputs:
+            output["output_pdf"] = None
     if outputs:
         for output in outputs:
             print(
                 f"[{output['index']}] {output['title']} "
-                f"(pages {output['start_page']}-{output['end_page']}) -> {output['output_pdf']}"
+                f"(pages {output['start_page']}-{output['end_page']}) -> {output['output_pdf'] or 'page range only'}"
             )
+    if outputs and not skip_write:
+        written = sum(output["bytes"] for output in outputs)
+        source_bytes = pdf_path.stat().st_size
+        print(
+            f"Wrote {len(outputs)} section(s), {written / (1024 * 1024):.1f} MB "
+            f"({written / max(1, source_bytes):.2f}x the source) in {elapsed:.2f}s."
+        )
 
     config_path = out_dir / "config.json"
     existing_config = load_existing_config(config_path)
@@ -153,8 +601,21 @@ def main() -> int:
         "toc_found": bool(toc_entries),
         "toc_level_requested": args.toc_level,
         "toc_level_used": effective_level,
+        "chapter_detection": (
+            {
+                "body_size": detection["body_size"],
+                "min_confidence": args.min_confidence,
+                "min_chapter_pages": args.min_chapter_pages,
+                "candidates": detection["candidates"],
+            }
+            if detection
+            else None
+        ),
+        "balance": {"min_pages": args.balance[0], "max_pages": args.balance[1]} if args.balance else None,
         "toc": toc_entries,
         "sections": outputs,
+        "sections_virtual": args.manifest_only,
+        "save_options": options if not args.manifest_only else None,
         "created_at": datetime.now(timezone.utc).isoformat(),
         "notes": existing_config.get("notes", ""),
     }